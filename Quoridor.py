@@ -3,6 +3,100 @@
 #  moving their pawn. Each player starts with 10 fences. Each fence blocks two
 #  tiles. Player wins by moving their pawn to the opponent's baseline.
 
+# tuples so the directions shared by every game (and baked into PAWN_MOVES) can't be changed
+ORTHO_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAG_DIRS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+JUMP_DIRS = ((-2, 0), (2, 0), (0, 2), (0, -2))
+
+
+def _fence_between(x1, y1, x2, y2):
+    """
+    Returns the fence (orientation, x, y) between two orthogonally adjacent tiles,
+    the same fence check_fence looks at.
+    """
+    move = (x2 - x1, y2 - y1)
+
+    if move == (-1, 0):
+        return 'h', x1, y1
+    elif move == (0, -1):
+        return 'v', x1, y1
+    elif move == (1, 0):
+        return 'h', x2, y2
+    return 'v', x2, y2
+
+
+def _fence_behind(x1, y1, x2, y2):
+    """
+    Returns the fence (orientation, x, y) on the far side of tile 2 as seen from tile 1,
+    which must be present for a diagonal move around a pawn on tile 2.
+    """
+    move = (x2 - x1, y2 - y1)
+
+    if move == (-1, 0):
+        return 'h', x2, y2
+    elif move == (0, -1):
+        return 'v', x2, y2
+    elif move == (1, 0):
+        return 'h', x2 + 1, y2
+    return 'v', x2, y2 + 1
+
+
+def _build_pawn_moves():
+    """
+    Builds the pawn move table used by check_move and get_valid_destinations.
+    For every pair of player tile and opponent tile, lists the destinations the player could
+    move to in the order get_valid_destinations tries them, along with the fences that must
+    be clear and the fences that must be present for that move to be valid.
+    Destinations off the board are left out since the board's edge fences always block them.
+    The table is indexed by (player_x * 9 + player_y) * 81 + (opp_x * 9 + opp_y).
+    Equal tuples (fence segments, moves, and whole entries when the opponent isn't nearby)
+    are shared rather than built again for each of the 6561 entries.
+    """
+    shared = {}
+    table = []
+
+    def share(value):
+        return shared.setdefault(value, value)
+
+    for start_x in range(9):
+        for start_y in range(9):
+            for opp_x in range(9):
+                for opp_y in range(9):
+                    moves = []
+                    next_to_opp = (opp_x - start_x, opp_y - start_y) in ORTHO_DIRS
+
+                    for move_x, move_y in ORTHO_DIRS + JUMP_DIRS + DIAG_DIRS:
+                        dest_x, dest_y = start_x + move_x, start_y + move_y
+
+                        if not 0 <= dest_x < 9 or not 0 <= dest_y < 9:
+                            continue
+                        elif (dest_x, dest_y) == (opp_x, opp_y):
+                            continue
+
+                        if (move_x, move_y) in ORTHO_DIRS:
+                            clear = (share(_fence_between(start_x, start_y, dest_x, dest_y)),)
+                            present = ()
+                        elif not next_to_opp or (dest_x - opp_x, dest_y - opp_y) not in ORTHO_DIRS:
+                            continue
+                        else:
+                            clear = (share(_fence_between(start_x, start_y, opp_x, opp_y)),
+                                     share(_fence_between(opp_x, opp_y, dest_x, dest_y)))
+                            if (move_x, move_y) in DIAG_DIRS:
+                                present = (share(_fence_behind(start_x, start_y, opp_x, opp_y)),)
+                            else:
+                                present = ()
+
+                        moves.append(share(((dest_x, dest_y), share(clear), share(present))))
+
+                    table.append(share(tuple(moves)))
+
+    return table
+
+
+# built once at import; see _build_pawn_moves
+PAWN_MOVES = _build_pawn_moves()
+
+
 class QuoridorGame:
     """
     Class that represents the board game Quoridor.
@@ -21,9 +115,9 @@ class QuoridorGame:
         self._turn = 1
         self._p1_loc = (0, 4)
         self._p2_loc = (8, 4)
-        self._ortho_dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        self._diag_dirs = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        self._jump_dirs = [(-2, 0), (2, 0), (0, 2), (0, -2)]
+        self._ortho_dirs = ORTHO_DIRS
+        self._diag_dirs = DIAG_DIRS
+        self._jump_dirs = JUMP_DIRS
         self._selected = False
 
         self._board = []
@@ -182,33 +276,44 @@ class QuoridorGame:
         Diagonal move and Jump move must have:
             Player pawn orthogonal to opponent pawn with no fence between
             Opponent pawn orthogonal to destination pawn with no fence between
+        These rules are worked out ahead of time for every pair of pawn locations in PAWN_MOVES,
+        so only the listed fences need to be checked.
         """
 
-        move = (dest_x - start_x, dest_y - start_y)
+        for dest, clear, present in self.get_pawn_moves(start_x, start_y, opp_x, opp_y):
+            if dest == (dest_x, dest_y):
+                return self.check_fences_clear(clear) and self.check_fences_present(present)
 
-        if move not in self.get_ortho_dirs() + self.get_diag_dirs() + self.get_jump_dirs():
-            return False
-        elif opp_x == dest_x and opp_y == dest_y:
-            return False
-        elif move in self.get_ortho_dirs():
-            return not self.check_fence(start_x, start_y, dest_x, dest_y)
-        elif move in self.get_diag_dirs():
-            if not self.check_fence_behind(start_x, start_y, opp_x, opp_y):
-                return False
-            elif not self.check_next_to(start_x, start_y, opp_x, opp_y, dest_x, dest_y):
-                return False
-            elif self.check_fence(start_x, start_y, opp_x, opp_y):
-                return False
-            elif self.check_fence(opp_x, opp_y, dest_x, dest_y):
+        return False
+
+    def get_pawn_moves(self, start_x, start_y, opp_x, opp_y):
+        """
+        Returns the precomputed candidate moves for a player at start with the opponent at opp:
+        a tuple of (destination, fences that must be clear, fences that must be present).
+        See _build_pawn_moves.
+        """
+        return PAWN_MOVES[(start_x * 9 + start_y) * 81 + opp_x * 9 + opp_y]
+
+    def check_fences_clear(self, fences):
+        """
+        Returns True if none of the given (orientation, x, y) fences are on the board.
+        """
+        for pos, x, y in fences:
+            if pos == 'h' and self.get_fences()[x][y].get_h_fence():
                 return False
-        elif move in self.get_jump_dirs():
-            if not self.check_next_to(start_x, start_y, opp_x, opp_y, dest_x, dest_y):
+            elif pos == 'v' and self.get_fences()[x][y].get_v_fence():
                 return False
-            elif self.check_fence(start_x, start_y, opp_x, opp_y):
+        return True
+
+    def check_fences_present(self, fences):
+        """
+        Returns True if all of the given (orientation, x, y) fences are on the board.
+        """
+        for pos, x, y in fences:
+            if pos == 'h' and not self.get_fences()[x][y].get_h_fence():
                 return False
-            elif self.check_fence(opp_x, opp_y, dest_x, dest_y):
+            elif pos == 'v' and not self.get_fences()[x][y].get_v_fence():
                 return False
-
         return True
 
     def get_valid_destinations(self):
@@ -228,46 +333,12 @@ class QuoridorGame:
         player_x, player_y = self.get_player_loc(player)
         opp_x, opp_y = self.get_player_loc(opp)
 
-        for move in self.get_ortho_dirs() + self.get_jump_dirs() + self.get_diag_dirs():
-            move_x, move_y = move
-            dest_x, dest_y = player_x + move_x, player_y + move_y
-            if self.check_move(player_x, player_y, opp_x, opp_y, dest_x, dest_y):
-                valid_moves.append((dest_x, dest_y))
+        for dest, clear, present in self.get_pawn_moves(player_x, player_y, opp_x, opp_y):
+            if self.check_fences_clear(clear) and self.check_fences_present(present):
+                valid_moves.append(dest)
 
         return valid_moves
 
-    def check_fence_behind(self, x1, y1, x2, y2):
-        """
-        Checks if there is a fence behind the destination's Tile.
-        Used to determine if diagonal moves are valid.
-        """
-        move_opp = (x2 - x1, y2 - y1)
-
-        if move_opp == (-1, 0):
-            # check if opp Tile has h_fence
-            return self.get_fences()[x2][y2].get_h_fence()
-        elif move_opp == (0, -1):
-            # check if opp Tile has v_fence
-            return self.get_fences()[x2][y2].get_v_fence()
-        elif move_opp == (1, 0):
-            # check if Tile below opp has h_fence
-            return self.get_fences()[x2+1][y2].get_h_fence()
-        elif move_opp == (0, 1):
-            # check if Tile to right of opp has v_fence
-            return self.get_fences()[x2][y2+1].get_v_fence()
-
-    def check_next_to(self, start_x, start_y, opp_x, opp_y, dest_x, dest_y):
-        """
-        Verifies that both the player pawn and opponent pawn as well as the opponent
-        pawn and the destination tile are within one orthogonal space of each other.
-        Both must be true for a valid diagonal move or valid pawn jump move.
-        """
-        if (opp_x - start_x, opp_y - start_y) not in self.get_ortho_dirs():
-            return False
-        elif (dest_x - opp_x, dest_y - opp_y) not in self.get_ortho_dirs():
-            return False
-        return True
-
     def update_board(self, player, x1, y1, x2, y2):
         """
         Moves the given player's pawn from start Tile to destination Tile.
@@ -308,6 +379,38 @@ class QuoridorGame:
         elif self.get_turn() != player or self.player_fences(player) == 0:
             return False
 
+        if not self.check_fence_placement(pos, coords):
+            return False
+
+        self.set_fence(pos, coords, True)
+        self.update_turn()
+        self.use_fence(player)
+        return True
+
+    def set_fence(self, pos, coords, state):
+        """
+        Sets (state True) or clears (state False) the fence of the given orientation ('h' or 'v')
+        starting at coords: both of its edges and its start vertex.
+        Does not check that the placement is valid, whose turn it is or how many fences are left.
+        """
+        x, y = coords
+
+        if pos == 'h':
+            self.get_fences()[x][y].set_h_fence(state)
+            self.get_fences()[x][y].set_h_fence_start(state)
+            self.get_fences()[x][y+1].set_h_fence(state)
+        elif pos == 'v':
+            self.get_fences()[x][y].set_v_fence(state)
+            self.get_fences()[x][y].set_v_fence_start(state)
+            self.get_fences()[x+1][y].set_v_fence(state)
+
+    def check_fence_placement(self, pos, coords):
+        """
+        Checks whether a fence can be placed at the given coords in the given orientation ('h' or 'v').
+        Does not check whose turn it is or how many fences they have left, and leaves the board unchanged.
+        Returns True if the placement is valid.
+        """
+
         # if placing vertical fence:
         # must not be vertical fence in current or below vertex
         # below left vertex must not have h_fence_start
@@ -323,6 +426,8 @@ class QuoridorGame:
             return False
         elif pos == 'v' and (not 0 <= x < 8 or not 1 <= y < 9):
             return False
+        elif pos != 'h' and pos != 'v':
+            return False
 
         # if already fence there or next spot over, return False
         if pos == 'h' and (self.get_fences()[x][y].get_h_fence() or self.get_fences()[x][y+1].get_h_fence()):
@@ -337,35 +442,68 @@ class QuoridorGame:
         elif pos == 'h' and self.get_fences()[x-1][y+1].get_v_fence_start():
             return False
 
-        # place fences and check fair play
-        # if fair play not broken, update player turn and return True
+        # put the fence in temporarily to check fair play, then take it back out
         if pos == 'h':
             self.get_fences()[x][y].set_h_fence(True)
-            self.get_fences()[x][y].set_h_fence_start(True)
             self.get_fences()[x][y+1].set_h_fence(True)
-
-            if not self.check_fair_play(1) or not self.check_fair_play(2):
-                self.get_fences()[x][y].set_h_fence(False)
-                self.get_fences()[x][y].set_h_fence_start(False)
-                self.get_fences()[x][y+1].set_h_fence(False)
-                print('breaks fair play')
-                return False
-
-        elif pos == 'v':
+            fair_play = self.check_fair_play(1) and self.check_fair_play(2)
+            self.get_fences()[x][y].set_h_fence(False)
+            self.get_fences()[x][y+1].set_h_fence(False)
+        else:
             self.get_fences()[x][y].set_v_fence(True)
-            self.get_fences()[x][y].set_v_fence_start(True)
             self.get_fences()[x+1][y].set_v_fence(True)
+            fair_play = self.check_fair_play(1) and self.check_fair_play(2)
+            self.get_fences()[x][y].set_v_fence(False)
+            self.get_fences()[x+1][y].set_v_fence(False)
 
-            if not self.check_fair_play(1) or not self.check_fair_play(2):
-                self.get_fences()[x][y].set_v_fence(False)
-                self.get_fences()[x][y].set_v_fence_start(False)
-                self.get_fences()[x+1][y].set_v_fence(False)
-                print('breaks fair play')
-                return False
+        return fair_play
 
-        self.update_turn()
-        self.use_fence(player)
-        return True
+    def get_valid_fences(self):
+        """
+        Returns a set of (orientation, coords) tuples for every fence the current player can place.
+        Empty if the game is over or the current player has no fences left.
+        """
+        valid_fences = set()
+
+        if self.is_winner(1) or self.is_winner(2) or self.player_fences(self.get_turn()) == 0:
+            return valid_fences
+
+        for x in range(1, 9):
+            for y in range(0, 8):
+                if self.check_fence_placement('h', (x, y)):
+                    valid_fences.add(('h', (x, y)))
+
+        for x in range(0, 8):
+            for y in range(1, 9):
+                if self.check_fence_placement('v', (x, y)):
+                    valid_fences.add(('v', (x, y)))
+
+        return valid_fences
+
+    def remove_fence(self, player, pos, coords):
+        """
+        Removes a fence previously placed with place_fence and gives it back to the given player.
+        Takes the same parameters as place_fence. Does not change whose turn it is.
+        Used to take back fence placements when searching through moves.
+        """
+        self.set_fence(pos, coords, False)
+
+        if player == 1:
+            self._p1_fences += 1
+        else:
+            self._p2_fences += 1
+
+    def play_move(self, move):
+        """
+        Plays a move for the player whose turn it is. The move is a tuple of (kind, coords):
+            ('m', (x, y)) moves the pawn to tile (x, y)
+            ('h', (x, y)) or ('v', (x, y)) places a fence the same way place_fence does
+        Returns True if the move was legal and played, False if not.
+        """
+        kind, coords = move
+        if kind == 'm':
+            return self.move_pawn(self.get_turn(), coords)
+        return self.place_fence(self.get_turn(), kind, coords)
 
     def is_winner(self, player):
         """
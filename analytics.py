@@ -0,0 +1,317 @@
+#  Streaming analytics over Quoridor game archives
+#  Reads an archive in chunks, replays each game through QuoridorGame and adds it to
+#  running totals, so memory stays the same no matter how large the archive is.
+#  GameStats from separate chunks (or separate worker processes) can be merged.
+#
+#  An archive has one game per line, each a JSON array of moves as taken by QuoridorGame.play_move:
+#    [["m", 1, 4], ["m", 7, 4], ["h", 6, 4], ...]
+#  The collected statistics are:
+#    fence heatmaps      how often each fence slot was used, per orientation
+#    path difference     average (p2 shortest path - p1 shortest path) after each ply
+#    fence timing        how many fences each player placed at each ply
+#    openings            games, p1 wins and p2 wins for each opening (first few moves);
+#                        once max_openings different openings have been seen, games with
+#                        a new opening are counted under OTHER_OPENING
+#  Lines that can't be read count as invalid games, like games with an illegal move.
+
+import collections
+import concurrent.futures
+import json
+
+from Quoridor import QuoridorGame
+
+OPENING_LENGTH = 4
+MAX_OPENINGS = 10000
+CHUNK_SIZE = 1000
+
+# opening key for the games whose opening didn't fit under max_openings
+OTHER_OPENING = 'other'
+
+
+def parse_game(line):
+    """
+    Returns the move list for one archive line, or None if the line isn't a valid move list.
+    """
+    try:
+        moves = [(kind, (x, y)) for kind, x, y in json.loads(line)]
+    except (ValueError, TypeError):
+        return None
+
+    for kind, (x, y) in moves:
+        if kind not in ('m', 'h', 'v') or type(x) is not int or type(y) is not int:
+            return None
+    return moves
+
+
+def read_games(path):
+    """
+    Yields the move list of each game in the archive one at a time.
+    Blank lines are skipped; lines that can't be read are yielded as None.
+    """
+    with open(path) as archive:
+        for line in archive:
+            if line.strip():
+                yield parse_game(line)
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of at most chunk_size games from the archive.
+    """
+    chunk = []
+    for moves in read_games(path):
+        chunk.append(moves)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def shortest_path_length(game, player):
+    """
+    Returns the number of moves the given player's pawn needs to reach its goal row,
+    ignoring the other pawn (as check_fair_play does). Returns None if there is no path.
+    """
+    if player == 1:
+        goal_row = 8
+    else:
+        goal_row = 0
+
+    start = game.get_player_loc(player)
+    seen = {start}
+    frontier = [start]
+    steps = 0
+
+    while frontier:
+        next_frontier = []
+        for x, y in frontier:
+            if x == goal_row:
+                return steps
+            for move_x, move_y in game.get_ortho_dirs():
+                dest_x, dest_y = x + move_x, y + move_y
+                if 0 <= dest_x < 9 and 0 <= dest_y < 9 and (dest_x, dest_y) not in seen:
+                    if not game.check_fence(x, y, dest_x, dest_y):
+                        seen.add((dest_x, dest_y))
+                        next_frontier.append((dest_x, dest_y))
+        frontier = next_frontier
+        steps += 1
+
+    return None
+
+
+def _add_lists(totals, values):
+    """
+    Adds values into totals element by element, growing totals if values is longer.
+    """
+    if len(values) > len(totals):
+        totals.extend([0] * (len(values) - len(totals)))
+    for index, value in enumerate(values):
+        totals[index] += value
+
+
+class GameStats:
+    """
+    Class that represents running totals collected from replayed games.
+    """
+
+    def __init__(self, opening_length=OPENING_LENGTH, max_openings=MAX_OPENINGS):
+        """
+        Initializes empty totals. Openings are keyed by their first opening_length moves,
+        see opening_key. At most max_openings openings are kept; games with any other
+        opening are counted under OTHER_OPENING.
+        """
+        self._opening_length = opening_length
+        self._max_openings = max_openings
+        self._games = 0
+        self._invalid_games = 0
+        self._wins = [0, 0]
+        self._h_heatmap = [[0] * 8 for _ in range(8)]
+        self._v_heatmap = [[0] * 8 for _ in range(8)]
+        self._path_diff_totals = []
+        self._path_diff_counts = []
+        self._p1_fence_plies = []
+        self._p2_fence_plies = []
+        self._openings = {}
+
+    def get_games(self):
+        """Returns the number of games added."""
+        return self._games
+
+    def get_invalid_games(self):
+        """Returns the number of games that couldn't be read or stopped early on an illegal move."""
+        return self._invalid_games
+
+    def get_wins(self, player):
+        """Returns the number of games won by the given player (1 or 2)."""
+        return self._wins[player - 1]
+
+    def get_heatmap(self, pos):
+        """
+        Returns an 8 x 8 list of how often each fence slot of the given orientation was used.
+        h slot (x, y) is at [x - 1][y], v slot (x, y) is at [x][y - 1].
+        """
+        if pos == 'h':
+            return self._h_heatmap
+        return self._v_heatmap
+
+    def get_path_diff_curve(self):
+        """
+        Returns a list with the average (p2 shortest path - p1 shortest path) after each ply.
+        Positive values favor player 1.
+        """
+        return [total / count if count else 0.0
+                for total, count in zip(self._path_diff_totals, self._path_diff_counts)]
+
+    def get_fence_timing(self, player):
+        """Returns a list with how many fences the given player placed at each ply."""
+        if player == 1:
+            return self._p1_fence_plies
+        return self._p2_fence_plies
+
+    def get_opening_win_rates(self):
+        """
+        Returns a dict mapping each opening (see opening_key) to a tuple of
+        (games, player 1 win rate, player 2 win rate). Games whose opening wasn't kept
+        are under OTHER_OPENING.
+        """
+        rates = {}
+        for opening, (games, p1_wins, p2_wins) in self._openings.items():
+            rates[opening] = (games, p1_wins / games, p2_wins / games)
+        return rates
+
+    def opening_key(self, moves):
+        """
+        Returns the opening key for a game: a tuple of its first opening_length moves,
+        e.g. (('m', (1, 4)), ('h', (7, 3)), ...).
+        """
+        return tuple(moves[:self._opening_length])
+
+    def _get_opening_totals(self, opening):
+        """
+        Returns the [games, p1 wins, p2 wins] totals to add a game with the given opening to.
+        A new opening gets its own totals while fewer than max_openings are kept, and
+        otherwise is added to OTHER_OPENING's totals.
+        """
+        if opening not in self._openings:
+            kept = len(self._openings) - (OTHER_OPENING in self._openings)
+            if kept >= self._max_openings:
+                opening = OTHER_OPENING
+        return self._openings.setdefault(opening, [0, 0, 0])
+
+    def add_game(self, moves):
+        """
+        Replays a game's moves from the start position and adds it to the totals.
+        Replay stops at the first illegal move, and the game counts as invalid.
+        moves may be None for an archive line that couldn't be read; it counts as invalid.
+        """
+        if moves is None:
+            self._games += 1
+            self._invalid_games += 1
+            return
+
+        game = QuoridorGame()
+        path_diffs = []
+        p1_fences = []
+        p2_fences = []
+        valid = True
+
+        for ply, move in enumerate(moves):
+            player = game.get_turn()
+            if not game.play_move(move):
+                valid = False
+                break
+
+            kind, coords = move
+            if kind != 'm':
+                x, y = coords
+                if kind == 'h':
+                    self._h_heatmap[x - 1][y] += 1
+                else:
+                    self._v_heatmap[x][y - 1] += 1
+
+                fence_plies = p1_fences if player == 1 else p2_fences
+                fence_plies.extend([0] * (ply + 1 - len(fence_plies)))
+                fence_plies[ply] += 1
+
+            path_diffs.append(shortest_path_length(game, 2) - shortest_path_length(game, 1))
+
+        self._games += 1
+        if not valid:
+            self._invalid_games += 1
+
+        _add_lists(self._path_diff_totals, path_diffs)
+        _add_lists(self._path_diff_counts, [1] * len(path_diffs))
+        _add_lists(self._p1_fence_plies, p1_fences)
+        _add_lists(self._p2_fence_plies, p2_fences)
+
+        # only the moves that were actually played, so an illegal move can't add a new opening
+        opening = self.opening_key(moves[:len(path_diffs)])
+        totals = self._get_opening_totals(opening)
+        totals[0] += 1
+        for player in (1, 2):
+            if game.is_winner(player):
+                self._wins[player - 1] += 1
+                totals[player] += 1
+
+    def merge(self, other):
+        """
+        Adds the totals from another GameStats into this one.
+        Openings from other that don't fit under this one's max_openings go to OTHER_OPENING.
+        """
+        self._games += other._games
+        self._invalid_games += other._invalid_games
+        self._wins[0] += other._wins[0]
+        self._wins[1] += other._wins[1]
+
+        for row, other_row in zip(self._h_heatmap, other._h_heatmap):
+            _add_lists(row, other_row)
+        for row, other_row in zip(self._v_heatmap, other._v_heatmap):
+            _add_lists(row, other_row)
+
+        _add_lists(self._path_diff_totals, other._path_diff_totals)
+        _add_lists(self._path_diff_counts, other._path_diff_counts)
+        _add_lists(self._p1_fence_plies, other._p1_fence_plies)
+        _add_lists(self._p2_fence_plies, other._p2_fence_plies)
+
+        for opening, other_totals in other._openings.items():
+            _add_lists(self._get_opening_totals(opening), other_totals)
+
+
+def analyze_chunk(chunk, opening_length=OPENING_LENGTH, max_openings=MAX_OPENINGS):
+    """
+    Returns a GameStats for a list of games. Used as the worker task in analyze_archive.
+    """
+    stats = GameStats(opening_length, max_openings)
+    for moves in chunk:
+        stats.add_game(moves)
+    return stats
+
+
+def analyze_archive(path, chunk_size=CHUNK_SIZE, processes=None, opening_length=OPENING_LENGTH,
+                    max_openings=MAX_OPENINGS):
+    """
+    Reads the archive in chunks and returns the merged GameStats for every game in it.
+    With processes set, chunks are analyzed in that many worker processes; at most
+    2 * processes chunks are read ahead, so memory does not grow with the archive.
+    Chunk results are merged in archive order either way, so which openings are kept
+    under max_openings (and the returned totals) don't depend on processes.
+    """
+    stats = GameStats(opening_length, max_openings)
+
+    if not processes:
+        for chunk in read_chunks(path, chunk_size):
+            stats.merge(analyze_chunk(chunk, opening_length, max_openings))
+        return stats
+
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        pending = collections.deque()
+        for chunk in read_chunks(path, chunk_size):
+            pending.append(executor.submit(analyze_chunk, chunk, opening_length, max_openings))
+            if len(pending) >= 2 * processes:
+                stats.merge(pending.popleft().result())
+
+        while pending:
+            stats.merge(pending.popleft().result())
+
+    return stats
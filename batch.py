@@ -0,0 +1,458 @@
+#  Lockstep batch simulator for Quoridor
+#  Holds K games as NumPy arrays (pawn locations, fence edges, fence counts, turn) and
+#  advances all of them with a single step(actions) call. Legal action masks are computed
+#  for every game at once, following the same rules as check_move and place_fence.
+#  Games that finish are reset to the start position automatically.
+#
+#  Actions are integers 0-139:
+#    0-11     pawn moves, offsets in the order get_valid_destinations tries them
+#             (ortho dirs, then jump dirs, then diag dirs)
+#    12-75    horizontal fences, FENCE_SLOTS order: x = 1 + i // 8, y = i % 8
+#    76-139   vertical fences, FENCE_SLOTS order: x = i // 8, y = 1 + i % 8
+
+import numpy as np
+
+from Quoridor import QuoridorGame
+from symmetry import position_key, game_from_key
+
+_TEMPLATE = QuoridorGame()
+PAWN_OFFSETS = np.array(_TEMPLATE.get_ortho_dirs() + _TEMPLATE.get_jump_dirs() + _TEMPLATE.get_diag_dirs())
+
+NUM_PAWN_ACTIONS = 12
+NUM_FENCE_SLOTS = 64
+NUM_ACTIONS = NUM_PAWN_ACTIONS + 2 * NUM_FENCE_SLOTS
+H_OFFSET = NUM_PAWN_ACTIONS
+V_OFFSET = NUM_PAWN_ACTIONS + NUM_FENCE_SLOTS
+
+# index into the stacked blocked array for each orthogonal direction of get_ortho_dirs:
+# up (-1, 0), down (1, 0), left (0, -1), right (0, 1)
+_UP, _DOWN, _LEFT, _RIGHT = 0, 1, 2, 3
+_JUMP_ORTHO = [_UP, _DOWN, _RIGHT, _LEFT]
+_DIAG_ORTHO = [(_UP, _LEFT), (_UP, _RIGHT), (_DOWN, _LEFT), (_DOWN, _RIGHT)]
+
+# interior fence edges covered by each fence slot
+#   inner h edges are h_edges[:, 1:9, :] (8 x 9), inner v edges are v_edges[:, :, 1:9] (9 x 8)
+_H_SLOT_EDGES = np.zeros((NUM_FENCE_SLOTS, 8, 9), dtype=bool)
+_V_SLOT_EDGES = np.zeros((NUM_FENCE_SLOTS, 9, 8), dtype=bool)
+for _slot in range(NUM_FENCE_SLOTS):
+    _i, _j = divmod(_slot, 8)
+    _H_SLOT_EDGES[_slot, _i, _j] = _H_SLOT_EDGES[_slot, _i, _j + 1] = True
+    _V_SLOT_EDGES[_slot, _i, _j] = _V_SLOT_EDGES[_slot, _i + 1, _j] = True
+
+
+def action_to_move(action, player_loc):
+    """
+    Returns the perft style move tuple for an action taken by a pawn standing at player_loc.
+    """
+    if action < H_OFFSET:
+        move_x, move_y = PAWN_OFFSETS[action]
+        return 'm', (player_loc[0] + int(move_x), player_loc[1] + int(move_y))
+    elif action < V_OFFSET:
+        i, j = divmod(action - H_OFFSET, 8)
+        return 'h', (i + 1, j)
+    i, j = divmod(action - V_OFFSET, 8)
+    return 'v', (i, j + 1)
+
+
+def move_to_action(move, player_loc):
+    """
+    Returns the action number for a perft style move tuple played by a pawn standing at player_loc.
+    """
+    kind, coords = move
+    x, y = coords
+
+    if kind == 'm':
+        offset = (x - player_loc[0], y - player_loc[1])
+        for action, (move_x, move_y) in enumerate(PAWN_OFFSETS):
+            if (move_x, move_y) == offset:
+                return action
+        raise ValueError('not a pawn move offset: ' + str(offset))
+    elif kind == 'h':
+        return H_OFFSET + (x - 1) * 8 + y
+    return V_OFFSET + x * 8 + (y - 1)
+
+
+def sample_actions(mask, rng):
+    """
+    Picks one legal action uniformly at random for each game from a legal action mask.
+    """
+    return np.argmax(rng.random(mask.shape) * mask, axis=1)
+
+
+def _row_bits(open_edges):
+    """
+    Packs a K x 9 x 8 or K x 8 x 9 boolean edge array into one uint16 per row,
+    with bit y set where open_edges[k, x, y] is True.
+    """
+    packed = np.packbits(open_edges, axis=-1, bitorder='little')
+    if packed.shape[-1] == 1:
+        packed = np.concatenate([packed, np.zeros_like(packed)], axis=-1)
+    return np.ascontiguousarray(packed).view('<u2')[..., 0]
+
+
+def _reaches_goal(h_bits, v_bits, goal_row, locs):
+    """
+    Returns a boolean array saying whether each pawn at locs (N x 2) can reach the goal row.
+    h_bits (N x 8) has bit y of row x set where there is no fence between tiles (x, y) and (x + 1, y),
+    v_bits (N x 9) has bit y of row x set where there is no fence between tiles (x, y) and (x, y + 1).
+    Each board row is held as 9 bits and the fill grows one step in every direction at a
+    time from the pawn. A game leaves the fill as soon as it reaches the goal row or stops
+    growing, so the work follows each game's own path length rather than the longest one.
+    """
+    result = np.zeros(len(locs), dtype=bool)
+    active = np.arange(len(locs))
+
+    reach = np.zeros((len(locs), 9), dtype=np.uint16)
+    reach[active, locs[:, 0]] = np.left_shift(1, locs[:, 1]).astype(np.uint16)
+
+    while len(active):
+        grown = reach | ((reach & v_bits) << 1) | ((reach >> 1) & v_bits)
+        grown[:, 1:] |= reach[:, :8] & h_bits
+        grown[:, :8] |= reach[:, 1:] & h_bits
+
+        arrived = grown[:, goal_row] != 0
+        result[active[arrived]] = True
+        going = ~arrived & np.any(grown != reach, axis=1)
+
+        active = active[going]
+        reach = grown[going]
+        h_bits = h_bits[going]
+        v_bits = v_bits[going]
+
+    return result
+
+
+def _distances(h_open, v_open, goal_row):
+    """
+    Returns the number of moves from each tile to the goal row (ignoring pawns), 127 if unreachable.
+    Takes the same open edge arrays as _reaches_goal.
+    """
+    dist = np.full(h_open.shape[:1] + (9, 9), 127, dtype=np.int16)
+    dist[:, goal_row, :] = 0
+    reach = dist == 0
+
+    for step in range(1, 82):
+        grown = reach.copy()
+        grown[:, :8, :] |= reach[:, 1:, :] & h_open
+        grown[:, 1:, :] |= reach[:, :8, :] & h_open
+        grown[:, :, :8] |= reach[:, :, 1:] & v_open
+        grown[:, :, 1:] |= reach[:, :, :8] & v_open
+        new = grown & ~reach
+        if not new.any():
+            break
+        dist[new] = step
+        reach = grown
+
+    return dist
+
+
+def _path_edges(dist, h_open, v_open, locs):
+    """
+    Follows one shortest path from each pawn location down the distances from _distances
+    and returns (h_path, v_path): the inner h and v edges the path crosses.
+    """
+    rows = np.arange(len(locs))
+    x = locs[:, 0].copy()
+    y = locs[:, 1].copy()
+    h_path = np.zeros(h_open.shape, dtype=bool)
+    v_path = np.zeros(v_open.shape, dtype=bool)
+    active = (dist[rows, x, y] > 0) & (dist[rows, x, y] < 127)
+
+    while active.any():
+        target = dist[rows, x, y] - 1
+        up_x, down_x = np.maximum(x - 1, 0), np.minimum(x + 1, 8)
+        left_y, right_y = np.maximum(y - 1, 0), np.minimum(y + 1, 8)
+        go_up = (x > 0) & h_open[rows, up_x, y] & (dist[rows, up_x, y] == target)
+        go_down = (x < 8) & h_open[rows, np.minimum(x, 7), y] & (dist[rows, down_x, y] == target)
+        go_left = (y > 0) & v_open[rows, x, left_y] & (dist[rows, x, left_y] == target)
+        go_right = (y < 8) & v_open[rows, x, np.minimum(y, 7)] & (dist[rows, x, right_y] == target)
+
+        go_up &= active
+        go_down &= active & ~go_up
+        go_left &= active & ~go_up & ~go_down
+        go_right &= active & ~go_up & ~go_down & ~go_left
+
+        h_path[rows[go_up], up_x[go_up], y[go_up]] = True
+        h_path[rows[go_down], x[go_down], y[go_down]] = True
+        v_path[rows[go_left], x[go_left], left_y[go_left]] = True
+        v_path[rows[go_right], x[go_right], y[go_right]] = True
+
+        x = np.where(go_up, up_x, np.where(go_down, down_x, x))
+        y = np.where(go_left, left_y, np.where(go_right, right_y, y))
+        active &= target > 0
+
+    return h_path, v_path
+
+
+class BatchQuoridor:
+    """
+    Class that represents K Quoridor games stepped in lockstep.
+    """
+
+    def __init__(self, num_games):
+        """
+        Initializes num_games games, all at the start position.
+        Arrays (first axis is the game):
+            _locs         K x 2 x 2 pawn (x, y) for player 1 and player 2
+            _h_edges      K x 10 x 9, same as Fence.get_h_fence (fence above tile (x, y))
+            _v_edges      K x 9 x 10, same as Fence.get_v_fence (fence left of tile (x, y))
+            _h_starts     K x 8 x 8 placed horizontal fences by slot
+            _v_starts     K x 8 x 8 placed vertical fences by slot
+            _fences_left  K x 2
+            _turn         K, 1 or 2
+        """
+        self._num_games = num_games
+        self._locs = np.zeros((num_games, 2, 2), dtype=np.int8)
+        self._h_edges = np.zeros((num_games, 10, 9), dtype=bool)
+        self._v_edges = np.zeros((num_games, 9, 10), dtype=bool)
+        self._h_starts = np.zeros((num_games, 8, 8), dtype=bool)
+        self._v_starts = np.zeros((num_games, 8, 8), dtype=bool)
+        self._fences_left = np.zeros((num_games, 2), dtype=np.int8)
+        self._turn = np.zeros(num_games, dtype=np.int8)
+        self.reset(np.ones(num_games, dtype=bool))
+
+    def get_num_games(self):
+        """Returns the number of games in the batch."""
+        return self._num_games
+
+    def get_locs(self):
+        """Returns the K x 2 x 2 array of pawn locations."""
+        return self._locs
+
+    def get_turn(self):
+        """Returns the array of whose turn (1 or 2) it is in each game."""
+        return self._turn
+
+    def get_fences_left(self):
+        """Returns the K x 2 array of fences each player has left."""
+        return self._fences_left
+
+    def reset(self, games):
+        """
+        Resets the games selected by the boolean array games to the start position.
+        """
+        self._locs[games] = [[0, 4], [8, 4]]
+        self._h_edges[games] = False
+        self._h_edges[games, 0, :] = True
+        self._h_edges[games, 9, :] = True
+        self._v_edges[games] = False
+        self._v_edges[games, :, 0] = True
+        self._v_edges[games, :, 9] = True
+        self._h_starts[games] = False
+        self._v_starts[games] = False
+        self._fences_left[games] = 10
+        self._turn[games] = 1
+
+    def set_game(self, index, game):
+        """
+        Loads the position of a QuoridorGame into the game at the given index.
+        """
+        turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = position_key(game)
+        selected = np.zeros(self._num_games, dtype=bool)
+        selected[index] = True
+        self.reset(selected)
+
+        self._locs[index] = [p1_loc, p2_loc]
+        self._fences_left[index] = [p1_fences, p2_fences]
+        self._turn[index] = turn
+        for x, y in h_fences:
+            self._h_starts[index, x - 1, y] = True
+            self._h_edges[index, x, y:y + 2] = True
+        for x, y in v_fences:
+            self._v_starts[index, x, y - 1] = True
+            self._v_edges[index, x:x + 2, y] = True
+
+    def get_game(self, index):
+        """
+        Returns a new QuoridorGame in the position of the game at the given index.
+        """
+        h_fences = tuple((int(i) + 1, int(j)) for i, j in zip(*np.nonzero(self._h_starts[index])))
+        v_fences = tuple((int(i), int(j) + 1) for i, j in zip(*np.nonzero(self._v_starts[index])))
+        p1_loc = tuple(int(c) for c in self._locs[index, 0])
+        p2_loc = tuple(int(c) for c in self._locs[index, 1])
+        return game_from_key((int(self._turn[index]), p1_loc, p2_loc,
+                              int(self._fences_left[index, 0]), int(self._fences_left[index, 1]),
+                              h_fences, v_fences))
+
+    def get_winners(self):
+        """
+        Returns an array with the winner (1 or 2) of each game, 0 if the game is still going.
+        """
+        winners = np.zeros(self._num_games, dtype=np.int8)
+        winners[self._locs[:, 0, 0] == 8] = 1
+        winners[self._locs[:, 1, 0] == 0] = 2
+        return winners
+
+    def _movers(self):
+        """
+        Returns the index (0 or 1) of the player to move and of their opponent for each game.
+        """
+        player = self._turn.astype(np.intp) - 1
+        return player, 1 - player
+
+    def pawn_mask(self):
+        """
+        Returns a K x 12 boolean array of legal pawn moves, following check_move.
+        """
+        games = np.arange(self._num_games)
+        player, opp = self._movers()
+        loc = self._locs[games, player].astype(np.intp)
+        opp_loc = self._locs[games, opp].astype(np.intp)
+
+        # blocked[k, d, x, y] is True if a fence blocks leaving tile (x, y) in ortho direction d
+        blocked = np.stack([self._h_edges[:, 0:9, :], self._h_edges[:, 1:10, :],
+                            self._v_edges[:, :, 0:9], self._v_edges[:, :, 1:10]], axis=1)
+        by_player = blocked[games, :, loc[:, 0], loc[:, 1]]
+        by_opp = blocked[games, :, opp_loc[:, 0], opp_loc[:, 1]]
+        adjacent = np.all(loc[:, None, :] + PAWN_OFFSETS[None, :4, :] == opp_loc[:, None, :], axis=2)
+
+        mask = np.zeros((self._num_games, NUM_PAWN_ACTIONS), dtype=bool)
+        mask[:, 0:4] = ~by_player & ~adjacent
+
+        for action, ortho in enumerate(_JUMP_ORTHO, start=4):
+            mask[:, action] = adjacent[:, ortho] & ~by_player[:, ortho] & ~by_opp[:, ortho]
+
+        for action, (vert, horiz) in enumerate(_DIAG_ORTHO, start=8):
+            via_vert = adjacent[:, vert] & by_opp[:, vert] & ~by_player[:, vert] & ~by_opp[:, horiz]
+            via_horiz = adjacent[:, horiz] & by_opp[:, horiz] & ~by_player[:, horiz] & ~by_opp[:, vert]
+            mask[:, action] = via_vert | via_horiz
+
+        return mask
+
+    def fence_mask(self):
+        """
+        Returns a K x 128 boolean array of legal fence placements, following place_fence:
+        the player must have fences left, the fence must not overlap or cross another one,
+        and both players must still be able to reach their goal row.
+        """
+        games = np.arange(self._num_games)
+        player, _ = self._movers()
+
+        h_mask = ~self._h_edges[:, 1:9, 0:8] & ~self._h_edges[:, 1:9, 1:9] & ~self._v_starts
+        v_mask = ~self._v_edges[:, 0:8, 1:9] & ~self._v_edges[:, 1:9, 1:9] & ~self._h_starts
+        mask = np.concatenate([h_mask.reshape(-1, NUM_FENCE_SLOTS), v_mask.reshape(-1, NUM_FENCE_SLOTS)], axis=1)
+        mask &= (self._fences_left[games, player] > 0)[:, None]
+
+        # a fence that doesn't cross either player's current shortest path can't cut them off,
+        # so fair play only needs checking for fences on one of those paths
+        game_idx, slot_idx = np.nonzero(mask & self._cuts_shortest_path())
+        if len(game_idx):
+            mask[game_idx, slot_idx] = self._fair_play(game_idx, slot_idx)
+
+        return mask
+
+    def _cuts_shortest_path(self):
+        """
+        Returns a K x 128 boolean array of fence slots that would cross one shortest
+        path of either player.
+        """
+        h_open = ~self._h_edges[:, 1:9, :]
+        v_open = ~self._v_edges[:, :, 1:9]
+        h_slot_edges = _H_SLOT_EDGES.reshape(NUM_FENCE_SLOTS, -1).T.astype(np.int16)
+        v_slot_edges = _V_SLOT_EDGES.reshape(NUM_FENCE_SLOTS, -1).T.astype(np.int16)
+        cuts = np.zeros((self._num_games, 2 * NUM_FENCE_SLOTS), dtype=bool)
+
+        for player, goal_row in ((0, 8), (1, 0)):
+            dist = _distances(h_open, v_open, goal_row)
+            h_path, v_path = _path_edges(dist, h_open, v_open, self._locs[:, player].astype(np.intp))
+            cuts[:, :NUM_FENCE_SLOTS] |= h_path.reshape(self._num_games, -1).astype(np.int16) @ h_slot_edges > 0
+            cuts[:, NUM_FENCE_SLOTS:] |= v_path.reshape(self._num_games, -1).astype(np.int16) @ v_slot_edges > 0
+
+        return cuts
+
+    def _fair_play(self, game_idx, slot_idx):
+        """
+        Returns a boolean array saying whether each (game, fence slot) candidate leaves
+        both players a path to their goal row.
+        """
+        h_bits = _row_bits(~self._h_edges[:, 1:9, :])[game_idx]
+        v_bits = _row_bits(~self._v_edges[:, :, 1:9])[game_idx]
+
+        # close the two edges of each candidate fence (see _H_SLOT_EDGES and _V_SLOT_EDGES)
+        rows = np.arange(len(game_idx))
+        i, j = np.divmod(slot_idx % NUM_FENCE_SLOTS, 8)
+        is_h = slot_idx < NUM_FENCE_SLOTS
+        is_v = ~is_h
+        h_bits[rows[is_h], i[is_h]] &= ~np.left_shift(3, j[is_h]).astype(np.uint16)
+        v_bits[rows[is_v], i[is_v]] &= ~np.left_shift(1, j[is_v]).astype(np.uint16)
+        v_bits[rows[is_v], i[is_v] + 1] &= ~np.left_shift(1, j[is_v]).astype(np.uint16)
+
+        # player 2 only needs checking where player 1 still has a path
+        locs = self._locs[game_idx].astype(np.intp)
+        legal = _reaches_goal(h_bits, v_bits, 8, locs[:, 0])
+        legal[legal] = _reaches_goal(h_bits[legal], v_bits[legal], 0, locs[legal, 1])
+        return legal
+
+    def legal_mask(self):
+        """
+        Returns a K x 140 boolean array of legal actions for the player to move in each game.
+        """
+        return np.concatenate([self.pawn_mask(), self.fence_mask()], axis=1)
+
+    def step(self, actions, mask=None):
+        """
+        Plays one action in every game. Illegal actions, including numbers outside 0-139,
+        leave their game unchanged.
+        mask may be passed in if legal_mask was already computed for this position.
+        Games that are won are reset to the start position.
+        Returns a tuple of (applied, winners): applied is True where the action was played,
+        winners is 1 or 2 for games won by this step (0 otherwise).
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        games = np.arange(self._num_games)
+        player, _ = self._movers()
+
+        # out of range actions are never applied, so they're never used as an index below
+        in_range = (actions >= 0) & (actions < NUM_ACTIONS)
+        applied = np.zeros(self._num_games, dtype=bool)
+
+        if mask is None:
+            is_pawn = in_range & (actions < NUM_PAWN_ACTIONS)
+            is_fence = in_range & (actions >= NUM_PAWN_ACTIONS)
+            applied[is_pawn] = self.pawn_mask()[games[is_pawn], actions[is_pawn]]
+            applied[is_fence] = self._check_fences(games[is_fence], actions[is_fence] - H_OFFSET)
+        else:
+            applied[in_range] = mask[games[in_range], actions[in_range]]
+
+        pawn = applied & (actions < NUM_PAWN_ACTIONS)
+        self._locs[games[pawn], player[pawn]] += PAWN_OFFSETS[actions[pawn]].astype(np.int8)
+
+        h = applied & (actions >= H_OFFSET) & (actions < V_OFFSET)
+        i, j = np.divmod(actions[h] - H_OFFSET, 8)
+        self._h_starts[games[h], i, j] = True
+        self._h_edges[games[h], i + 1, j] = True
+        self._h_edges[games[h], i + 1, j + 1] = True
+
+        v = applied & (actions >= V_OFFSET)
+        i, j = np.divmod(actions[v] - V_OFFSET, 8)
+        self._v_starts[games[v], i, j] = True
+        self._v_edges[games[v], i, j + 1] = True
+        self._v_edges[games[v], i + 1, j + 1] = True
+
+        fence = h | v
+        self._fences_left[games[fence], player[fence]] -= 1
+        self._turn[applied] = 3 - self._turn[applied]
+
+        winners = self.get_winners()
+        self.reset(winners > 0)
+        return applied, winners
+
+    def _check_fences(self, game_idx, slot_idx):
+        """
+        Returns whether each chosen fence slot (0-127) is legal in its game,
+        checking only that slot instead of building the whole fence mask.
+        """
+        player = self._turn[game_idx].astype(np.intp) - 1
+        legal = self._fences_left[game_idx, player] > 0
+
+        i, j = np.divmod(slot_idx % NUM_FENCE_SLOTS, 8)
+        is_h = slot_idx < NUM_FENCE_SLOTS
+        h_legal = ~self._h_edges[game_idx, i + 1, j] & ~self._h_edges[game_idx, i + 1, j + 1] & \
+            ~self._v_starts[game_idx, i, j]
+        v_legal = ~self._v_edges[game_idx, i, j + 1] & ~self._v_edges[game_idx, i + 1, j + 1] & \
+            ~self._h_starts[game_idx, i, j]
+        legal &= np.where(is_h, h_legal, v_legal)
+
+        if np.any(legal):
+            legal[legal] = self._fair_play(game_idx[legal], slot_idx[legal])
+        return legal
@@ -0,0 +1,250 @@
+#  Spectator broadcast for live Quoridor games
+#  Instead of sending the whole board after every move, each move is sent as a small
+#  delta event. A keyframe with the full position is sent every few moves (and to
+#  every new spectator) so spectators can join mid-game or resync.
+#  Each event is serialized once and the same bytes are queued for every spectator.
+#  Spectators that fall too far behind are dropped.
+#
+#  Events are compact JSON arrays, one per line:
+#    delta:    [seq, kind, x, y, turn, p1 fences left, p2 fences left]
+#              kind is 'm' (pawn move), 'h' or 'v' (fence placement)
+#    keyframe: [seq, 'k', turn, p1 loc, p2 loc, p1 fences left, p2 fences left, h fences, v fences]
+
+import collections
+import io
+import json
+
+from symmetry import position_key, game_from_key
+
+KEYFRAME_INTERVAL = 20
+MAX_PENDING = 256
+
+
+def encode_event(event):
+    """
+    Serializes an event into a single line of bytes.
+    """
+    return json.dumps(event, separators=(',', ':')).encode() + b'\n'
+
+
+def decode_event(data):
+    """
+    Turns a line of bytes from encode_event back into an event list.
+    """
+    return json.loads(data)
+
+
+def make_delta(seq, game, move):
+    """
+    Returns the delta event for a move that has just been played on the game.
+    """
+    kind, coords = move
+    x, y = coords
+    return [seq, kind, x, y, game.get_turn(), game.player_fences(1), game.player_fences(2)]
+
+
+def make_keyframe(seq, game):
+    """
+    Returns a keyframe event holding the game's full position.
+    """
+    turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = position_key(game)
+    return [seq, 'k', turn, list(p1_loc), list(p2_loc), p1_fences, p2_fences,
+            [list(coords) for coords in h_fences], [list(coords) for coords in v_fences]]
+
+
+def apply_event(game, event):
+    """
+    Applies an event to a spectator's copy of the game and returns the updated game.
+    A keyframe replaces the game with a new one, so always use the returned game.
+    """
+    if event[1] == 'k':
+        turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = event[2:]
+        return game_from_key((turn, tuple(p1_loc), tuple(p2_loc), p1_fences, p2_fences,
+                              tuple(tuple(coords) for coords in h_fences),
+                              tuple(tuple(coords) for coords in v_fences)))
+
+    seq, kind, x, y, turn, p1_fences, p2_fences = event
+    player = game.get_turn()
+
+    if kind == 'm':
+        start_x, start_y = game.get_player_loc(player)
+        game.update_board(player, start_x, start_y, x, y)
+    else:
+        game.set_fence(kind, (x, y), True)
+        game.use_fence(player)
+
+    game.update_turn()
+    return game
+
+
+class Subscriber:
+    """
+    Class that represents one spectator's connection.
+    Holds encoded events waiting to be written to the spectator's stream.
+    """
+
+    def __init__(self, stream, max_pending=MAX_PENDING):
+        """
+        Initializes a subscriber writing to the given stream (anything with a write method, see flush).
+        The subscriber is dropped if more than max_pending events are waiting to be written.
+        """
+        self._stream = stream
+        self._max_pending = max_pending
+        self._pending = collections.deque()
+        self._offset = 0
+        self._dropped = False
+
+    def get_pending(self):
+        """Returns the number of events waiting to be written."""
+        return len(self._pending)
+
+    def is_dropped(self):
+        """Returns True if the subscriber was dropped for falling behind or failing to write."""
+        return self._dropped
+
+    def enqueue(self, data):
+        """
+        Queues encoded event bytes for writing.
+        Returns False (and marks the subscriber dropped) if the backlog is full.
+        """
+        if len(self._pending) >= self._max_pending:
+            self._dropped = True
+            return False
+        self._pending.append(data)
+        return True
+
+    def flush(self):
+        """
+        Writes as many pending events as the stream accepts.
+        Partial writes are tracked with a byte offset into the oldest event, so the rest of
+        it is written next time rather than the whole event again. A stream that raises
+        BlockingIOError or returns 0 from write keeps its backlog for the next flush, as does a
+        non-blocking raw stream (io.RawIOBase) returning None. Other streams returning None
+        (such as asyncio.StreamWriter, which buffers everything) are taken to have written
+        all of it. Any other OSError drops the subscriber.
+        Returns False if the subscriber has been dropped.
+        """
+        while self._pending and not self._dropped:
+            data = self._pending[0]
+            try:
+                written = self._stream.write(data[self._offset:])
+            except BlockingIOError as error:
+                self._advance(error.characters_written)
+                break
+            except OSError:
+                self._dropped = True
+                break
+
+            if written is None and not isinstance(self._stream, io.RawIOBase):
+                written = len(data) - self._offset
+            if not written:
+                break
+            self._advance(written)
+        return not self._dropped
+
+    def _advance(self, written):
+        """
+        Moves the offset into the oldest pending event forward by the bytes written,
+        removing the event once all of it has been written.
+        """
+        self._offset += written
+        if self._offset >= len(self._pending[0]):
+            self._pending.popleft()
+            self._offset = 0
+
+
+class Broadcaster:
+    """
+    Class that fans out a live game's events to all of its spectators.
+    """
+
+    def __init__(self, game, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Initializes a broadcaster for the given game.
+        A keyframe is sent after every keyframe_interval deltas.
+        """
+        self._game = game
+        self._keyframe_interval = keyframe_interval
+        self._seq = 0
+        self._since_keyframe = 0
+        self._subscribers = []
+        self._keyframe = encode_event(make_keyframe(self._seq, game))
+        self._bytes_sent = 0
+        self._dropped_count = 0
+
+    def get_subscribers(self):
+        """Returns the list of connected subscribers."""
+        return self._subscribers
+
+    def get_bytes_sent(self):
+        """Returns the total bytes queued to all subscribers."""
+        return self._bytes_sent
+
+    def get_dropped_count(self):
+        """Returns how many subscribers have been dropped for falling behind."""
+        return self._dropped_count
+
+    def subscribe(self, stream, max_pending=MAX_PENDING):
+        """
+        Adds a spectator writing to the given stream and queues the latest keyframe for them.
+        Returns the new Subscriber.
+        """
+        subscriber = Subscriber(stream, max_pending)
+        keyframe = self.get_keyframe()
+        subscriber.enqueue(keyframe)
+        self._bytes_sent += len(keyframe)
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Removes a spectator."""
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def publish_move(self, move):
+        """
+        Broadcasts a move that has just been played on the game.
+        Sends a delta, followed by a keyframe every keyframe_interval moves.
+        """
+        self._seq += 1
+        self._publish(encode_event(make_delta(self._seq, self._game, move)))
+        self._since_keyframe += 1
+
+        if self._since_keyframe >= self._keyframe_interval:
+            self._since_keyframe = 0
+            self._keyframe = encode_event(make_keyframe(self._seq, self._game))
+            self._publish(self._keyframe)
+        else:
+            # the stored keyframe is out of date, get_keyframe rebuilds it when someone joins
+            self._keyframe = None
+
+    def get_keyframe(self):
+        """Returns the encoded keyframe for the current position."""
+        if self._keyframe is None:
+            self._keyframe = encode_event(make_keyframe(self._seq, self._game))
+        return self._keyframe
+
+    def _publish(self, data):
+        """
+        Queues encoded event bytes for every subscriber, dropping any that are too far behind.
+        """
+        kept = []
+        for subscriber in self._subscribers:
+            if subscriber.enqueue(data):
+                kept.append(subscriber)
+                self._bytes_sent += len(data)
+            else:
+                self._dropped_count += 1
+        self._subscribers = kept
+
+    def flush(self):
+        """
+        Writes pending events to every subscriber, dropping those whose stream failed.
+        """
+        kept = []
+        for subscriber in self._subscribers:
+            if subscriber.flush():
+                kept.append(subscriber)
+            else:
+                self._dropped_count += 1
+        self._subscribers = kept
@@ -0,0 +1,315 @@
+#  Append-only move journal for Quoridor games
+#  Every successful pawn move or fence placement is appended to a journal file so
+#  in-flight games can be rebuilt after a crash. Records are handed to a background
+#  writer thread, so playing a move never waits on disk. The writer groups records
+#  from all sessions into one write and syncs them to disk (fsync) every N records,
+#  every T milliseconds, or both.
+#
+#  Each record is a JSON array on its own line:
+#    [session id, 'n']           new game started
+#    [session id, kind, x, y]    move played, kind is 'm', 'h' or 'v' as in QuoridorGame.play_move
+#    [session id, 'e']           game finished or abandoned
+
+import json
+import os
+import queue
+import threading
+import time
+
+from Quoridor import QuoridorGame
+
+_CLOSE = object()
+
+
+def _repair_tail(path):
+    """
+    Cuts a partly written last line (left by a crash in the middle of a write) off the
+    journal file, so the next record starts on a line of its own.
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'r+b') as journal_file:
+        end = journal_file.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+
+        journal_file.seek(end - 1)
+        if journal_file.read(1) == b'\n':
+            return
+
+        # walk back a block at a time to find the last complete line
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 4096)
+            journal_file.seek(start)
+            block = journal_file.read(pos - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                journal_file.truncate(start + newline + 1)
+                return
+            pos = start
+        journal_file.truncate(0)
+
+
+def _encode_record(record):
+    """
+    Serializes a journal record into a line of bytes.
+    """
+    return json.dumps(record, separators=(',', ':')).encode() + b'\n'
+
+
+class MoveJournal:
+    """
+    Class that represents a write-ahead journal of moves shared by many game sessions.
+    """
+
+    def __init__(self, path, fsync_every=1, fsync_interval_ms=None):
+        """
+        Opens (or creates) the journal file at path for appending.
+        fsync_every syncs to disk once that many records have been written since the last sync
+        (1 syncs every batch of moves). fsync_interval_ms syncs at least that often while records
+        are waiting. Either may be None; with both None records are only synced on sync() or close().
+        """
+        self._path = path
+        self._fsync_every = fsync_every
+        if fsync_interval_ms is None:
+            self._fsync_interval = None
+        else:
+            self._fsync_interval = fsync_interval_ms / 1000
+        _repair_tail(path)
+        self._file = open(path, 'ab')
+        self._queue = queue.Queue()
+        self._records_written = 0
+        self._fsyncs = 0
+        self._closed = False
+        self._error = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def get_path(self):
+        """Returns the path of the journal file."""
+        return self._path
+
+    def get_stats(self):
+        """Returns a dict with the number of records written and fsyncs made."""
+        return {'records_written': self._records_written, 'fsyncs': self._fsyncs}
+
+    def _check_open(self):
+        """
+        Raises ValueError if the journal has been closed, or the OSError that stopped the
+        writer if writing or syncing the file failed.
+        """
+        if self._closed:
+            raise ValueError('journal is closed')
+        elif self._error is not None:
+            raise self._error
+
+    def start_game(self, session_id):
+        """Records that a new game was started for the session."""
+        self._check_open()
+        self._queue.put(_encode_record([session_id, 'n']))
+
+    def end_game(self, session_id):
+        """Records that the session's game is over, so recovery skips it."""
+        self._check_open()
+        self._queue.put(_encode_record([session_id, 'e']))
+
+    def append(self, session_id, move):
+        """
+        Records a move that was successfully played in the session's game.
+        Returns right away; the record is written by the background writer.
+        Raises the writer's OSError if an earlier write or sync failed.
+        """
+        self._check_open()
+        kind, coords = move
+        x, y = coords
+        self._queue.put(_encode_record([session_id, kind, x, y]))
+
+    def play(self, session_id, game, move):
+        """
+        Plays the move on the game for the player whose turn it is and journals it if it was legal.
+        Returns True if the move was played, False if not.
+        """
+        self._check_open()
+        if not game.play_move(move):
+            return False
+        self.append(session_id, move)
+        if game.is_winner(1) or game.is_winner(2):
+            self.end_game(session_id)
+        return True
+
+    def sync(self):
+        """
+        Blocks until every record appended so far has been written and synced to disk.
+        Raises the writer's OSError if writing or syncing failed.
+        """
+        self._check_open()
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """
+        Writes and syncs any remaining records, stops the writer thread and closes the file.
+        Raises the writer's OSError if writing or syncing failed.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._writer.join()
+        try:
+            self._file.close()
+        except OSError as error:
+            if self._error is None:
+                self._error = error
+        if self._error is not None:
+            raise self._error
+
+    def _fsync(self):
+        """
+        Flushes the file and syncs it to disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._fsyncs += 1
+
+    def _write_loop(self):
+        """
+        Background writer: takes every waiting record off the queue, writes them in one
+        go and syncs to disk according to the journal's fsync settings.
+        If a write or sync fails, the error is kept and later records are dropped, but
+        waiters are still released so sync() and close() can report the error.
+        """
+        unsynced = 0
+        last_sync = time.monotonic()
+        closing = False
+
+        while not closing:
+            timeout = None
+            if unsynced and self._fsync_interval is not None:
+                timeout = max(0.0, last_sync + self._fsync_interval - time.monotonic())
+
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = []
+            waiters = []
+            for item in batch:
+                if item is _CLOSE:
+                    closing = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    records.append(item)
+
+            if records and self._error is None:
+                try:
+                    self._file.write(b''.join(records))
+                    self._records_written += len(records)
+                    unsynced += len(records)
+                except OSError as error:
+                    self._error = error
+
+            if unsynced and self._error is None:
+                if waiters or closing:
+                    sync_now = True
+                elif self._fsync_every is not None and unsynced >= self._fsync_every:
+                    sync_now = True
+                elif self._fsync_interval is not None and time.monotonic() - last_sync >= self._fsync_interval:
+                    sync_now = True
+                else:
+                    sync_now = False
+
+                if sync_now:
+                    try:
+                        self._fsync()
+                    except OSError as error:
+                        self._error = error
+                    unsynced = 0
+                    last_sync = time.monotonic()
+
+            for waiter in waiters:
+                waiter.set()
+
+
+def _parse_record(line):
+    """
+    Returns (session id, kind, coords) for a journal line, with coords None for 'n' and 'e'
+    records. Returns None if the line isn't valid JSON or isn't shaped like a record.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+
+    if not isinstance(record, list) or len(record) < 2:
+        return None
+
+    session_id = record[0]
+    # JSON turns list session ids into lists; use tuples so they can be dict keys
+    if isinstance(session_id, list):
+        session_id = tuple(session_id)
+    try:
+        hash(session_id)
+    except TypeError:
+        return None
+
+    kind = record[1]
+    if kind in ('n', 'e') and len(record) == 2:
+        return session_id, kind, None
+    elif kind in ('m', 'h', 'v') and len(record) == 4 and type(record[2]) is int and type(record[3]) is int:
+        return session_id, kind, (record[2], record[3])
+    return session_id, None, None
+
+
+def recover(path):
+    """
+    Replays the journal at path and returns a tuple of (games, dropped): games maps session id
+    to a QuoridorGame for every game that was still in progress, and dropped is a set of the
+    session ids whose records couldn't be replayed (a malformed record or an illegal move),
+    which are left out of games rather than returned in a position that drifted from the real one.
+    A partly written last line (from a crash in the middle of a write) is ignored; a line that
+    can't be read anywhere else raises ValueError, since it can't be tied to a session.
+    """
+    games = {}
+    dropped = set()
+
+    if not os.path.exists(path):
+        return games, dropped
+
+    with open(path, 'rb') as journal_file:
+        lines = journal_file.readlines()
+
+    for line_number, line in enumerate(lines, 1):
+        parsed = _parse_record(line)
+        if parsed is None:
+            if line_number == len(lines):
+                break
+            raise ValueError('unreadable journal record on line ' + str(line_number))
+
+        session_id, kind, coords = parsed
+        if kind == 'n':
+            games[session_id] = QuoridorGame()
+            dropped.discard(session_id)
+        elif kind == 'e':
+            games.pop(session_id, None)
+            dropped.discard(session_id)
+        elif session_id in games and (kind is None or not games[session_id].play_move((kind, coords))):
+            games.pop(session_id, None)
+            dropped.add(session_id)
+
+    games = {session_id: game for session_id, game in games.items()
+             if not (game.is_winner(1) or game.is_winner(2))}
+    return games, dropped
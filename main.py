@@ -27,6 +27,8 @@ DIVIDER_COLOR = (148, 126, 115)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 DEST_CIRCLE = (150, 150, 150)
+LEGAL_FENCE_COLOR = (94, 62, 45, 120)
+ILLEGAL_FENCE_COLOR = (200, 40, 40, 120)
 
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption('Quoridor')
@@ -92,53 +94,64 @@ def draw_players(game):
         WIN.blit(text, text_rect)
 
 
-def calc_fence_click_locations():
+def get_fence_loc(pos):
     """
-    Populates a list of valid fence click locations.
+    Takes a mouse position and returns a tuple of (orientation, (row, col)) for the fence
+    slot under it, or None if the mouse isn't over a fence slot.
+    Vertical fence slots are the middle half of each tile edge along the inner column lines,
+    horizontal fence slots the middle half of each tile edge along the inner row lines,
+    each FENCE_WIDTH wide. The slot is found with arithmetic instead of scanning every slot.
     """
-    fence_click_locs = []
-
-    # for vertical fence locations:
-    # make a tuple for (top, right, bot, left, orientation?)
-    for x in range(1, 9):
-        for y in range(0, 9):
-            top = y * SQUARE_SIZE + (SQUARE_SIZE // 4)
-            bot = y * SQUARE_SIZE + 3 * (SQUARE_SIZE // 4)
-
-            left = x * SQUARE_SIZE - (FENCE_WIDTH // 2)
-            right = x * SQUARE_SIZE + (FENCE_WIDTH // 2)
-
-            orientation = 'v'
+    x, y = pos
 
-            fence_click_locs.append((top, right, bot, left, orientation))
+    if not 0 <= x < SQUARE_SIZE * COLS or not 0 <= y < SQUARE_SIZE * ROWS:
+        return None
 
-    # for horizontal fence locations:
-    for x in range(0, 9):
-        for y in range(1, 9):
-            top = y * SQUARE_SIZE - (FENCE_WIDTH // 2)
-            bot = y * SQUARE_SIZE + (FENCE_WIDTH // 2)
+    # offset of the mouse within its tile, used to find the middle half of the edge
+    tile_x = x % SQUARE_SIZE
+    tile_y = y % SQUARE_SIZE
+    mid_start = SQUARE_SIZE // 4
+    mid_end = 3 * (SQUARE_SIZE // 4)
 
-            left = x * SQUARE_SIZE + (SQUARE_SIZE // 4)
-            right = x * SQUARE_SIZE + 3 * (SQUARE_SIZE // 4)
+    # nearest column line and row line
+    col_line = round(x / SQUARE_SIZE)
+    row_line = round(y / SQUARE_SIZE)
 
-            orientation = 'h'
+    if 1 <= col_line < COLS and abs(x - col_line * SQUARE_SIZE) <= FENCE_WIDTH // 2 \
+            and mid_start <= tile_y <= mid_end:
+        return 'v', (y // SQUARE_SIZE, col_line)
 
-            fence_click_locs.append((top, right, bot, left, orientation))
+    if 1 <= row_line < ROWS and abs(y - row_line * SQUARE_SIZE) <= FENCE_WIDTH // 2 \
+            and mid_start <= tile_x <= mid_end:
+        return 'h', (row_line, x // SQUARE_SIZE)
 
-    return fence_click_locs
+    return None
 
 
-def get_fence_loc(bounds):
+def draw_fence_preview(fence_loc, legal_fences):
     """
-    Takes a tuple with the bounds an orientation of a fence click location and
-    returns the coordinates of the tile the player wants to place a fence.
-    Bounds will be (top, right, bot, left, orientation) where top, right, bot,
-    and left are integers representing a pixel location and orientation is
-    'h' or 'v' (the type of fence the player wants to place).
+    Draws a see-through fence at the hovered fence slot, colored by whether placing it is legal.
+    legal_fences is the cached set from QuoridorGame.get_valid_fences for the current position.
     """
+    orientation, coords = fence_loc
+    y, x = coords
+
+    x *= SQUARE_SIZE
+    y *= SQUARE_SIZE
 
+    if fence_loc in legal_fences:
+        color = LEGAL_FENCE_COLOR
+    else:
+        color = ILLEGAL_FENCE_COLOR
+
+    if orientation == 'h':
+        rect = pygame.Rect(x, y - (FENCE_WIDTH // 2), FENCE_LENGTH, FENCE_WIDTH)
+    else:
+        rect = pygame.Rect(x - (FENCE_WIDTH // 2), y, FENCE_WIDTH, FENCE_LENGTH)
 
-    pass
+    # clip fences that would hang off the board (only the last row/column slots)
+    rect = rect.clip(pygame.Rect(0, 0, SQUARE_SIZE * COLS, SQUARE_SIZE * ROWS))
+    gfxdraw.box(WIN, rect, color)
 
 
 def check_center_tile_clicked(pos, dest):
@@ -236,7 +249,10 @@ def main():
 
     q_game = QuoridorGame()
     draw_board()
-    valid_fence_click_locs = calc_fence_click_locations()
+
+    # legal fences only change when a move is made, so cache them for the hover preview
+    legal_fences = q_game.get_valid_fences()
+    hover_fence = None
 
     while run:
         clock.tick(FPS)
@@ -246,9 +262,11 @@ def main():
             if event.type == pygame.QUIT:
                 run = False
 
+            if event.type == pygame.MOUSEMOTION:
+                hover_fence = get_fence_loc(event.pos)
+
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
-                x, y = pos
                 row, col = get_row_col_from_mouse(pos)
                 print('row: ', row, 'col: ', col, 'pos: ', pos)
 
@@ -263,28 +281,25 @@ def main():
                         q_game.toggle_selected()
                     # if selected is already true and valid destination clicked, move pawn to destination
                     elif q_game.get_selected() and check_valid_dest_clicked(q_game, pos):
-                        q_game.move_pawn(player, (row, col))
+                        if q_game.move_pawn(player, (row, col)):
+                            legal_fences = q_game.get_valid_fences()
                         q_game.toggle_selected()
                     # if selected is false and valid fence placement clicked, place fence
                     elif not q_game.get_selected():
-                        for loc in valid_fence_click_locs:
-                            top, right, bot, left, orientation = loc
-
-                            if left <= x <= right and top <= y <= bot:
-                                if orientation == 'v':
-                                    row = y // SQUARE_SIZE
-                                    col = round(x / SQUARE_SIZE)
-                                else:
-                                    row = round(y / SQUARE_SIZE)
-                                    col = x // SQUARE_SIZE
-                                print(player, orientation, (row, col), (x, y))
-                                q_game.place_fence(player, orientation, (row, col))
+                        fence_loc = get_fence_loc(pos)
+                        if fence_loc is not None:
+                            orientation, coords = fence_loc
+                            print(player, orientation, coords, pos)
+                            if q_game.place_fence(player, orientation, coords):
+                                legal_fences = q_game.get_valid_fences()
 
         draw_board()
         draw_fences(q_game)
         draw_players(q_game)
         if q_game.get_selected():
             draw_valid_dest_circles(q_game)
+        elif hover_fence is not None and not (q_game.is_winner(1) or q_game.is_winner(2)):
+            draw_fence_preview(hover_fence, legal_fences)
 
         # draw whose turn it is or a message for the winner if game is over
         if q_game.is_winner(1):
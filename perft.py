@@ -0,0 +1,182 @@
+#  Perft for Quoridor
+#  Counts every legal sequence of pawn moves and fence placements from a position
+#  down to a given depth. The counts for fixed reference positions are known, so
+#  perft doubles as a correctness check for the move rules in QuoridorGame and as
+#  a throughput benchmark (nodes per second).
+
+import time
+
+from Quoridor import QuoridorGame
+
+# each move is a tuple of (kind, coords) as taken by QuoridorGame.play_move
+FENCE_SLOTS = [('h', (x, y)) for x in range(1, 9) for y in range(0, 8)] + \
+              [('v', (x, y)) for x in range(0, 8) for y in range(1, 9)]
+
+# reference positions are built by replaying moves from the start position
+# (alternating players starting with player 1) and map depth -> node count
+REFERENCE_POSITIONS = [
+    {
+        'name': 'start',
+        'moves': [],
+        'counts': {1: 131, 2: 16677},
+    },
+    {
+        'name': 'straight jump',
+        'moves': [('m', (1, 4)), ('m', (7, 4)), ('m', (2, 4)), ('m', (6, 4)),
+                  ('m', (3, 4)), ('m', (5, 4)), ('m', (4, 4)), ('h', (8, 0))],
+        'counts': {1: 129, 2: 16168},
+    },
+    {
+        'name': 'jump blocked by fence behind, diagonals open',
+        'moves': [('m', (1, 4)), ('m', (7, 4)), ('m', (2, 4)), ('m', (6, 4)),
+                  ('m', (3, 4)), ('m', (5, 4)), ('m', (4, 4)), ('h', (6, 4))],
+        'counts': {1: 129, 2: 15922},
+    },
+    {
+        'name': 'fence between pawns, no jump or diagonals',
+        'moves': [('m', (1, 4)), ('m', (7, 4)), ('m', (2, 4)), ('m', (6, 4)),
+                  ('m', (3, 4)), ('m', (5, 4)), ('m', (4, 4)), ('h', (5, 3))],
+        'counts': {1: 127, 2: 15666},
+    },
+    {
+        'name': 'side by side, vertical fence behind',
+        'moves': [('m', (1, 4)), ('m', (7, 4)), ('m', (2, 4)), ('m', (6, 4)),
+                  ('m', (3, 4)), ('m', (5, 4)), ('m', (4, 4)), ('m', (5, 5)),
+                  ('v', (4, 6)), ('m', (4, 5))],
+        'counts': {1: 129, 2: 15922},
+    },
+]
+
+
+def make_move(game, move):
+    """
+    Plays the given move for the player whose turn it is (see QuoridorGame.play_move).
+    Returns True if the move was legal and played, False if not.
+    """
+    return game.play_move(move)
+
+
+def unmake_move(game, move, player_loc):
+    """
+    Takes back a move that was just played by make_move.
+    player_loc is where the moving player's pawn stood before a pawn move.
+    """
+    game.update_turn()
+    player = game.get_turn()
+    kind, coords = move
+
+    if kind == 'm':
+        dest_x, dest_y = coords
+        start_x, start_y = player_loc
+        game.update_board(player, dest_x, dest_y, start_x, start_y)
+    else:
+        game.remove_fence(player, kind, coords)
+
+
+def _perft(game, depth):
+    """
+    Recursive node counter behind perft and divide.
+    """
+    if depth == 0:
+        return 1
+
+    player_loc = game.get_player_loc(game.get_turn())
+    nodes = 0
+
+    for dest in game.get_valid_destinations():
+        move = ('m', dest)
+        if make_move(game, move):
+            nodes += _perft(game, depth - 1)
+            unmake_move(game, move, player_loc)
+
+    for move in FENCE_SLOTS:
+        if make_move(game, move):
+            nodes += _perft(game, depth - 1)
+            unmake_move(game, move, player_loc)
+
+    return nodes
+
+
+def perft(game, depth):
+    """
+    Returns the number of legal move sequences of the given depth from the game's current position.
+    The game is left in the position it started in.
+    """
+    return _perft(game, depth)
+
+
+def divide(game, depth):
+    """
+    Returns a dict mapping each legal move from the current position to the
+    perft count of the position it leads to (searched to depth - 1).
+    """
+    results = {}
+    player_loc = game.get_player_loc(game.get_turn())
+    moves = [('m', dest) for dest in game.get_valid_destinations()] + FENCE_SLOTS
+
+    for move in moves:
+        if make_move(game, move):
+            results[move] = _perft(game, depth - 1)
+            unmake_move(game, move, player_loc)
+
+    return results
+
+
+def setup_position(moves):
+    """
+    Returns a new QuoridorGame with the given moves replayed from the start position.
+    Raises ValueError if one of the moves is not legal.
+    """
+    game = QuoridorGame()
+
+    for move in moves:
+        if not make_move(game, move):
+            raise ValueError('illegal move in setup: ' + str(move))
+
+    return game
+
+
+def benchmark(game, depth):
+    """
+    Runs perft on the given game and returns a tuple of (nodes, seconds, nodes per second).
+    """
+    start = time.perf_counter()
+    nodes = perft(game, depth)
+    seconds = time.perf_counter() - start
+
+    if seconds > 0:
+        return nodes, seconds, nodes / seconds
+    return nodes, seconds, 0.0
+
+
+def verify(max_depth=2):
+    """
+    Runs perft on every reference position up to max_depth and compares against the known counts.
+    Returns a list of (name, depth, expected, actual) tuples for each mismatch (empty if all match).
+    """
+    mismatches = []
+
+    for position in REFERENCE_POSITIONS:
+        game = setup_position(position['moves'])
+        for depth, expected in sorted(position['counts'].items()):
+            if depth > max_depth:
+                continue
+            actual = perft(game, depth)
+            if actual != expected:
+                mismatches.append((position['name'], depth, expected, actual))
+
+    return mismatches
+
+
+def main():
+    for position in REFERENCE_POSITIONS:
+        game = setup_position(position['moves'])
+        for depth, expected in sorted(position['counts'].items()):
+            nodes, seconds, nps = benchmark(game, depth)
+            status = 'ok' if nodes == expected else 'MISMATCH (expected ' + str(expected) + ')'
+            print(position['name'], 'depth', depth, 'nodes', nodes,
+                  '{:.2f}s'.format(seconds), '{:.0f} nodes/sec'.format(nps), status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#  Memory-bounded session store for live Quoridor games
+#  A live QuoridorGame holds 181 Tile/Fence objects and takes tens of KB, while its
+#  position packs into 21 bytes. The store keeps recently used games live and
+#  hibernates the least recently used ones into their packed form whenever the
+#  live games go over the memory budget. Hibernated games are restored on the next get.
+#
+#  Packed layout (21 bytes):
+#    turn, p1 tile, p2 tile, p1 fences left, p2 fences left (1 byte each, tile = x * 9 + y)
+#    h fence bitmask (8 bytes, bit (x - 1) * 8 + y for each placed fence)
+#    v fence bitmask (8 bytes, bit x * 8 + (y - 1) for each placed fence)
+
+import collections
+import struct
+import sys
+
+from Quoridor import QuoridorGame
+from symmetry import position_key, game_from_key
+
+_PACKED_FORMAT = '<5B2Q'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def encode_game(game):
+    """
+    Packs the game's position into bytes.
+    """
+    turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = position_key(game)
+
+    h_mask = 0
+    for x, y in h_fences:
+        h_mask |= 1 << ((x - 1) * 8 + y)
+
+    v_mask = 0
+    for x, y in v_fences:
+        v_mask |= 1 << (x * 8 + (y - 1))
+
+    return struct.pack(_PACKED_FORMAT, turn, p1_loc[0] * 9 + p1_loc[1], p2_loc[0] * 9 + p2_loc[1],
+                       p1_fences, p2_fences, h_mask, v_mask)
+
+
+def decode_game(data):
+    """
+    Returns a new QuoridorGame set up in the position packed by encode_game.
+    """
+    turn, p1_tile, p2_tile, p1_fences, p2_fences, h_mask, v_mask = struct.unpack(_PACKED_FORMAT, data)
+
+    h_fences = tuple((bit // 8 + 1, bit % 8) for bit in range(64) if h_mask >> bit & 1)
+    v_fences = tuple((bit // 8, bit % 8 + 1) for bit in range(64) if v_mask >> bit & 1)
+
+    return game_from_key((turn, divmod(p1_tile, 9), divmod(p2_tile, 9),
+                          p1_fences, p2_fences, h_fences, v_fences))
+
+
+def estimate_game_size(game):
+    """
+    Returns an estimate in bytes of the memory held by a live game:
+    the game, its Tile and Fence objects, their attribute dicts and the lists and tuples they hold.
+    """
+    seen = set()
+    pending = [game]
+    total = 0
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if hasattr(obj, '__dict__'):
+            pending.append(obj.__dict__)
+        if isinstance(obj, dict):
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            pending.extend(obj)
+
+    return total
+
+
+class SessionStore:
+    """
+    Class that holds games by session id within a memory budget.
+    Games are hibernated (packed into bytes) in least recently used order when the
+    live games take more than the budget, and restored the next time they are requested.
+    Callers should get() a game again rather than keep a reference to it, since a
+    hibernated game is restored as a new QuoridorGame.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initializes an empty store that keeps live games within max_bytes.
+        """
+        self._max_bytes = max_bytes
+        self._live = collections.OrderedDict()
+        self._hibernated = {}
+        self._live_game_bytes = estimate_game_size(QuoridorGame())
+        self._hibernations = 0
+        self._restorations = 0
+
+    def __len__(self):
+        """Returns the number of sessions in the store."""
+        return len(self._live) + len(self._hibernated)
+
+    def __contains__(self, session_id):
+        """Returns True if the store holds a game for the session id."""
+        return session_id in self._live or session_id in self._hibernated
+
+    def put(self, session_id, game):
+        """
+        Stores a game under the given session id as the most recently used live game.
+        """
+        self._hibernated.pop(session_id, None)
+        self._live[session_id] = game
+        self._live.move_to_end(session_id)
+        self._enforce_budget()
+
+    def get(self, session_id):
+        """
+        Returns the game for the given session id, restoring it if it was hibernated.
+        Returns None if the store has no such session.
+        """
+        if session_id in self._live:
+            self._live.move_to_end(session_id)
+            return self._live[session_id]
+
+        data = self._hibernated.pop(session_id, None)
+        if data is None:
+            return None
+
+        game = decode_game(data)
+        self._restorations += 1
+        self._live[session_id] = game
+        self._enforce_budget()
+        return game
+
+    def remove(self, session_id):
+        """Removes the session from the store."""
+        self._live.pop(session_id, None)
+        self._hibernated.pop(session_id, None)
+
+    def hibernate(self, session_id):
+        """
+        Packs a live game into bytes and drops the live game from memory.
+        """
+        game = self._live.pop(session_id, None)
+        if game is None:
+            return
+        self._hibernated[session_id] = encode_game(game)
+        self._hibernations += 1
+
+    def _enforce_budget(self):
+        """
+        Hibernates least recently used games until the live games fit in the budget.
+        The most recently used game always stays live.
+        """
+        while len(self._live) > 1 and len(self._live) * self._live_game_bytes > self._max_bytes:
+            session_id = next(iter(self._live))
+            self.hibernate(session_id)
+
+    def get_stats(self):
+        """
+        Returns a dict with the number of live and hibernated games, bytes per game in
+        each state, total bytes and how many times games were hibernated and restored.
+        Hibernated sizes are the memory held by each bytes object (sys.getsizeof), not just
+        the packed length, so they compare fairly with the live game estimate.
+        """
+        hibernated_bytes = sum(sys.getsizeof(data) for data in self._hibernated.values())
+        if self._hibernated:
+            bytes_per_hibernated_game = hibernated_bytes / len(self._hibernated)
+        else:
+            bytes_per_hibernated_game = sys.getsizeof(bytes(struct.calcsize(_PACKED_FORMAT)))
+
+        return {
+            'live': len(self._live),
+            'hibernated': len(self._hibernated),
+            'bytes_per_live_game': self._live_game_bytes,
+            'bytes_per_hibernated_game': bytes_per_hibernated_game,
+            'live_bytes': len(self._live) * self._live_game_bytes,
+            'hibernated_bytes': hibernated_bytes,
+            'hibernations': self._hibernations,
+            'restorations': self._restorations,
+        }
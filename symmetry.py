@@ -0,0 +1,146 @@
+#  Left-right mirror symmetry for Quoridor positions
+#  Reflecting the board across the central column (column 4) turns any position into
+#  an equally valid position with mirrored moves. Keying caches, opening books and
+#  endgame tables by the canonical (smaller) of the two keys lets mirrored positions
+#  share one entry.
+#
+#  Moves use the same (kind, coords) tuples as perft: ('m', (x, y)) for pawn moves,
+#  ('h', (x, y)) and ('v', (x, y)) for fence placements.
+
+from Quoridor import QuoridorGame
+
+
+def get_placed_fences(game, pos):
+    """
+    Returns a sorted tuple of the coords of every fence of the given orientation ('h' or 'v')
+    placed on the board. Coords match the ones passed to place_fence.
+    """
+    placed = []
+
+    for row in game.get_fences():
+        for vertex in row:
+            if pos == 'h' and vertex.get_h_fence_start():
+                placed.append(vertex.get_coords())
+            elif pos == 'v' and vertex.get_v_fence_start():
+                placed.append(vertex.get_coords())
+
+    return tuple(sorted(placed))
+
+
+def position_key(game):
+    """
+    Returns a hashable key describing the game's position:
+    (turn, p1 location, p2 location, p1 fences left, p2 fences left, h fences, v fences)
+    """
+    return (game.get_turn(),
+            game.get_player_loc(1),
+            game.get_player_loc(2),
+            game.player_fences(1),
+            game.player_fences(2),
+            get_placed_fences(game, 'h'),
+            get_placed_fences(game, 'v'))
+
+
+def game_from_key(key):
+    """
+    Returns a new QuoridorGame set up in the position described by the given position key.
+    """
+    turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = key
+    game = QuoridorGame()
+
+    # clear both starting tiles first so a pawn can land on the other's starting tile
+    for player in (1, 2):
+        start_x, start_y = game.get_player_loc(player)
+        game.get_board()[start_x][start_y].set_piece(None)
+
+    for player, loc in ((1, p1_loc), (2, p2_loc)):
+        dest_x, dest_y = loc
+        game.set_player_loc(player, loc)
+        game.get_board()[dest_x][dest_y].set_piece(player)
+
+    for coords in h_fences:
+        game.set_fence('h', coords, True)
+    for coords in v_fences:
+        game.set_fence('v', coords, True)
+
+    while game.player_fences(1) > p1_fences:
+        game.use_fence(1)
+    while game.player_fences(2) > p2_fences:
+        game.use_fence(2)
+
+    if game.get_turn() != turn:
+        game.update_turn()
+
+    return game
+
+
+def mirror_coords(pos, coords):
+    """
+    Returns the coords of a tile ('m'), horizontal fence ('h') or vertical fence ('v')
+    after reflecting the board across the central column.
+    A horizontal fence covers columns y and y + 1, so it lands on 7 - y.
+    A vertical fence runs along the left edge of column y, so it lands on 9 - y.
+    """
+    x, y = coords
+
+    if pos == 'h':
+        return x, 7 - y
+    elif pos == 'v':
+        return x, 9 - y
+    return x, 8 - y
+
+
+def mirror_key(key):
+    """
+    Returns the position key of the mirror image of the position with the given key.
+    """
+    turn, p1_loc, p2_loc, p1_fences, p2_fences, h_fences, v_fences = key
+
+    return (turn,
+            mirror_coords('m', p1_loc),
+            mirror_coords('m', p2_loc),
+            p1_fences,
+            p2_fences,
+            tuple(sorted(mirror_coords('h', coords) for coords in h_fences)),
+            tuple(sorted(mirror_coords('v', coords) for coords in v_fences)))
+
+
+def mirror_move(move):
+    """
+    Returns the mirror image of a move. Mirroring twice gives back the original move.
+    """
+    kind, coords = move
+    return kind, mirror_coords(kind, coords)
+
+
+def canonicalize(game):
+    """
+    Returns a tuple of (canonical key, mirrored) for the game's position.
+    The canonical key is the smaller of the position's key and its mirror's key.
+    mirrored is True if the canonical key describes the mirror image of the game.
+    """
+    key = position_key(game)
+    mirrored = mirror_key(key)
+
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+def to_canonical_move(move, mirrored):
+    """
+    Maps a move in the game's orientation to the orientation of its canonical key.
+    """
+    if mirrored:
+        return mirror_move(move)
+    return move
+
+
+def to_original_move(move, mirrored):
+    """
+    Maps a move stored against a canonical key (e.g. a book or cache move) back to
+    the orientation of the game the key came from.
+    """
+    if mirrored:
+        return mirror_move(move)
+    return move
@@ -0,0 +1,164 @@
+#  Tests for archive analytics
+#  Archives are generated from seeded random playouts and written to pytest's tmp_path.
+
+import json
+import random
+
+import pytest
+
+from Quoridor import QuoridorGame
+from analytics import (OTHER_OPENING, GameStats, analyze_archive, analyze_chunk, parse_game,
+                       shortest_path_length)
+
+
+def random_game(rng, max_plies=200):
+    """Returns the moves of a random legal game, as archive style [kind, x, y] lists."""
+    game = QuoridorGame()
+    moves = []
+    for _ in range(max_plies):
+        if game.is_winner(1) or game.is_winner(2):
+            break
+        choices = [('m', dest) for dest in game.get_valid_destinations()]
+        choices += sorted(game.get_valid_fences())
+        kind, (x, y) = rng.choice(choices)
+        assert game.play_move((kind, (x, y)))
+        moves.append([kind, x, y])
+    return moves
+
+
+@pytest.fixture(scope='module')
+def archive_lines():
+    """Archive lines for random games, with a blank line, an unreadable line and an illegal game."""
+    rng = random.Random(7)
+    lines = [json.dumps(random_game(rng)) for _ in range(24)]
+    lines.insert(5, '')
+    lines.insert(10, '[["m", 1')
+    lines.insert(20, json.dumps([['m', 1, 4], ['m', 5, 5]]))
+    return lines
+
+
+@pytest.fixture
+def archive(tmp_path, archive_lines):
+    path = tmp_path / 'archive.jsonl'
+    path.write_text('\n'.join(archive_lines) + '\n')
+    return str(path)
+
+
+def summary(stats):
+    """Returns every total a GameStats exposes, for comparing two of them."""
+    return (stats.get_games(), stats.get_invalid_games(), stats.get_wins(1), stats.get_wins(2),
+            stats.get_heatmap('h'), stats.get_heatmap('v'), stats.get_path_diff_curve(),
+            stats.get_fence_timing(1), stats.get_fence_timing(2), stats.get_opening_win_rates())
+
+
+def test_parse_game():
+    """parse_game reads valid move lists and returns None for anything else."""
+    assert parse_game('[["m", 1, 4], ["h", 7, 3], ["v", 2, 5]]') == [
+        ('m', (1, 4)), ('h', (7, 3)), ('v', (2, 5))]
+    assert parse_game('[]') == []
+
+    for line in ['[["m", 1', '{"m": 1}', '[["m", 1, 4, 5]]', '[["x", 1, 4]]',
+                 '[["m", 1.0, 4]]', '[["m", true, 4]]', '[["m", "1", 4]]', '"m"', '5']:
+        assert parse_game(line) is None, line
+
+
+def test_add_game_totals():
+    """A replayed game adds to the heatmaps, fence timing, path curve and win counts."""
+    stats = GameStats()
+    stats.add_game([('h', (7, 3)), ('m', (7, 4)), ('m', (1, 4)), ('v', (2, 5))])
+
+    assert stats.get_games() == 1
+    assert stats.get_invalid_games() == 0
+    assert stats.get_heatmap('h')[6][3] == 1
+    assert stats.get_heatmap('v')[2][4] == 1
+    assert stats.get_fence_timing(1) == [1]
+    assert stats.get_fence_timing(2) == [0, 0, 0, 1]
+    assert len(stats.get_path_diff_curve()) == 4
+    assert stats.get_wins(1) == 0 and stats.get_wins(2) == 0
+
+
+def test_illegal_and_unreadable_games_are_invalid():
+    """Replay stops at an illegal move; unreadable lines count as invalid games."""
+    stats = GameStats()
+    stats.add_game([('m', (1, 4)), ('m', (5, 5)), ('m', (2, 4))])
+    stats.add_game(None)
+
+    assert stats.get_games() == 2
+    assert stats.get_invalid_games() == 2
+    # only the move that was played counts towards the path curve and the opening
+    assert len(stats.get_path_diff_curve()) == 1
+    assert list(stats.get_opening_win_rates()) == [(('m', (1, 4)),)]
+
+
+def test_openings_keep_fence_coords():
+    """Openings with fences in different places are counted separately."""
+    stats = GameStats(opening_length=2)
+    stats.add_game([('h', (7, 3)), ('m', (7, 4))])
+    stats.add_game([('h', (2, 3)), ('m', (7, 4))])
+    stats.add_game([('h', (7, 3)), ('m', (7, 4))])
+
+    assert stats.get_opening_win_rates() == {
+        (('h', (7, 3)), ('m', (7, 4))): (2, 0.0, 0.0),
+        (('h', (2, 3)), ('m', (7, 4))): (1, 0.0, 0.0),
+    }
+
+
+def test_openings_over_the_cap_go_to_other():
+    """Once max_openings openings are kept, games with new openings count under OTHER_OPENING."""
+    stats = GameStats(opening_length=1, max_openings=2)
+    for coords in [(1, 4), (0, 3), (0, 5), (1, 4), (0, 5)]:
+        stats.add_game([('m', coords)])
+
+    assert stats.get_opening_win_rates() == {
+        (('m', (1, 4)),): (2, 0.0, 0.0),
+        (('m', (0, 3)),): (1, 0.0, 0.0),
+        OTHER_OPENING: (2, 0.0, 0.0),
+    }
+
+
+def test_merge_matches_adding_every_game(archive_lines):
+    """Merging the stats of two halves gives the same totals as adding every game to one."""
+    games = [parse_game(line) for line in archive_lines if line]
+    whole = analyze_chunk(games)
+    first = analyze_chunk(games[:17])
+    first.merge(analyze_chunk(games[17:]))
+
+    assert summary(first) == summary(whole)
+    assert whole.get_games() == 26
+    assert whole.get_invalid_games() == 2
+
+
+def test_merge_respects_the_cap():
+    """Openings merged in past max_openings are added to OTHER_OPENING."""
+    stats = GameStats(opening_length=1, max_openings=2)
+    stats.add_game([('m', (1, 4))])
+    other = GameStats(opening_length=1, max_openings=2)
+    other.add_game([('m', (0, 3))])
+    other.add_game([('m', (0, 5))])
+    stats.merge(other)
+
+    assert stats.get_opening_win_rates() == {
+        (('m', (1, 4)),): (1, 0.0, 0.0),
+        (('m', (0, 3)),): (1, 0.0, 0.0),
+        OTHER_OPENING: (1, 0.0, 0.0),
+    }
+
+
+@pytest.mark.parametrize('max_openings', [3, 10000])
+def test_process_pool_matches_single_process(archive, max_openings):
+    """Analyzing with a process pool gives the same totals as one process."""
+    single = analyze_archive(archive, chunk_size=4, max_openings=max_openings)
+    pooled = analyze_archive(archive, chunk_size=4, processes=2, max_openings=max_openings)
+
+    assert summary(pooled) == summary(single)
+    assert single.get_games() == 26
+
+
+def test_shortest_path_length():
+    """Path lengths ignore the other pawn and follow the fences."""
+    game = QuoridorGame()
+    assert shortest_path_length(game, 1) == 8
+    assert shortest_path_length(game, 2) == 8
+
+    assert game.place_fence(1, 'h', (1, 3))
+    assert shortest_path_length(game, 1) == 9
@@ -0,0 +1,107 @@
+#  Tests for the batch simulator
+#  Every game in the batch is shadowed by a QuoridorGame; masks, steps and get_game must
+#  agree with it move for move over random playouts.
+
+import numpy as np
+import pytest
+
+from Quoridor import QuoridorGame
+from batch import NUM_ACTIONS, BatchQuoridor, action_to_move, move_to_action, sample_actions
+from symmetry import position_key
+
+
+def legal_actions(game):
+    """Returns the set of legal action numbers for the player to move in a QuoridorGame."""
+    loc = game.get_player_loc(game.get_turn())
+    moves = [('m', dest) for dest in game.get_valid_destinations()] + list(game.get_valid_fences())
+    return {move_to_action(move, loc) for move in moves}
+
+
+def check_batch(batch, games):
+    """Asserts that every game in the batch matches its shadow QuoridorGame."""
+    mask = batch.legal_mask()
+    assert mask.shape == (batch.get_num_games(), NUM_ACTIONS)
+    for index, game in enumerate(games):
+        assert position_key(batch.get_game(index)) == position_key(game)
+        assert set(np.nonzero(mask[index])[0].tolist()) == legal_actions(game)
+    return mask
+
+
+@pytest.mark.parametrize('seed, pass_mask', [(0, True), (1, False), (2, True)])
+def test_random_playouts_match_quoridor_game(seed, pass_mask):
+    """legal_mask, step and get_game agree with QuoridorGame on random playouts."""
+    rng = np.random.default_rng(seed)
+    num_games = 6
+    batch = BatchQuoridor(num_games)
+    games = [QuoridorGame() for _ in range(num_games)]
+
+    for _ in range(60):
+        mask = check_batch(batch, games)
+
+        # favor pawn moves half the time so some games are won and reset
+        actions = sample_actions(mask, rng)
+        pawn_actions = sample_actions(mask[:, :12], rng)
+        actions = np.where(rng.random(num_games) < 0.5, pawn_actions, actions)
+
+        locs = [game.get_player_loc(game.get_turn()) for game in games]
+        applied, winners = batch.step(actions, mask if pass_mask else None)
+
+        assert applied.all()
+        for index, game in enumerate(games):
+            assert game.play_move(action_to_move(int(actions[index]), locs[index]))
+            if game.is_winner(1) or game.is_winner(2):
+                assert winners[index] == (1 if game.is_winner(1) else 2)
+                games[index] = QuoridorGame()
+            else:
+                assert winners[index] == 0
+
+    check_batch(batch, games)
+
+
+@pytest.mark.parametrize('pass_mask', [True, False])
+def test_illegal_and_out_of_range_actions_are_not_applied(pass_mask):
+    """Actions outside 0-139 and illegal actions leave their game unchanged; others still play."""
+    batch = BatchQuoridor(6)
+    games = [QuoridorGame() for _ in range(6)]
+    mask = check_batch(batch, games)
+
+    # move up off the board, jump with nobody to jump, three numbers outside 0-139 and a legal move
+    actions = np.array([0, 5, -1, NUM_ACTIONS, 10 ** 6, 1])
+    applied, winners = batch.step(actions, mask if pass_mask else None)
+
+    assert applied.tolist() == [False, False, False, False, False, True]
+    assert winners.tolist() == [0] * 6
+    assert games[5].play_move(('m', (1, 4)))
+    check_batch(batch, games)
+
+
+def test_illegal_fences_are_not_applied():
+    """Overlapping, crossing and path blocking fences and fences with none left are refused."""
+    batch = BatchQuoridor(4)
+    games = [QuoridorGame() for _ in range(4)]
+
+    setups = [
+        [('h', (4, 2))],
+        [('h', (4, 2))],
+        [('h', (1, 2)), ('m', (7, 4)), ('h', (1, 4)), ('m', (6, 4)), ('v', (0, 2))],
+        [],
+    ]
+    for index, moves in enumerate(setups):
+        for move in moves:
+            assert games[index].play_move(move)
+    while games[3].player_fences(1):
+        games[3].use_fence(1)
+    for index, game in enumerate(games):
+        batch.set_game(index, game)
+    check_batch(batch, games)
+
+    # overlaps h (4, 2), crosses h (4, 2), shuts player 1 into row 0 columns 2-5, none left
+    moves = [('h', (4, 3)), ('v', (3, 3)), ('v', (0, 6)), ('h', (4, 2))]
+    for index, move in enumerate(moves):
+        assert not games[index].play_move(move)
+    actions = [move_to_action(move, (0, 0)) for move in moves]
+
+    for mask in (batch.legal_mask(), None):
+        applied, _ = batch.step(actions, mask)
+        assert not applied.any()
+    check_batch(batch, games)
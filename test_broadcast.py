@@ -0,0 +1,173 @@
+#  Tests for the spectator broadcast
+#  Spectators read events back from their streams and apply them with apply_event;
+#  their copy of the game must match the live game after every flush.
+
+import io
+import random
+
+import pytest
+
+from Quoridor import QuoridorGame
+from broadcast import Broadcaster, Subscriber, apply_event, decode_event
+from symmetry import position_key
+
+
+class TrickleStream:
+    """Stream that accepts at most chunk_size bytes per write, like a slow socket."""
+
+    def __init__(self, chunk_size):
+        self.data = bytearray()
+        self.chunk_size = chunk_size
+
+    def write(self, data):
+        written = data[:self.chunk_size]
+        self.data += written
+        return len(written)
+
+
+class BlockingStream:
+    """Stream that takes chunk_size bytes and then raises BlockingIOError on each write."""
+
+    def __init__(self, chunk_size):
+        self.data = bytearray()
+        self.chunk_size = chunk_size
+
+    def write(self, data):
+        written = data[:self.chunk_size]
+        self.data += written
+        raise BlockingIOError(0, 'would block', len(written))
+
+
+class BufferingStream:
+    """Stream whose write buffers everything and returns None, like asyncio.StreamWriter."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+class Spectator:
+    """Reads complete event lines off a stream and applies them to its own game."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.read = 0
+        self.game = None
+
+    def catch_up(self):
+        end = self.stream.data.rfind(b'\n') + 1
+        for line in bytes(self.stream.data[self.read:end]).splitlines():
+            event = decode_event(line)
+            if self.game is None:
+                # a spectator can't do anything until it has its first keyframe
+                assert event[1] == 'k'
+            self.game = apply_event(self.game, event)
+        self.read = end
+
+
+def random_moves(game, seed, count):
+    """Plays up to count random legal moves on the game, yielding each move after it is played."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        if game.is_winner(1) or game.is_winner(2):
+            return
+        moves = [('m', dest) for dest in game.get_valid_destinations()]
+        moves += sorted(game.get_valid_fences())
+        move = rng.choice(moves)
+        assert game.play_move(move)
+        yield move
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_spectators_stay_in_sync(seed):
+    """Spectators joining at different times and writing at different speeds track the live game."""
+    game = QuoridorGame()
+    broadcaster = Broadcaster(game, keyframe_interval=5)
+    spectators = [Spectator(TrickleStream(7)), Spectator(BlockingStream(5)), Spectator(BufferingStream())]
+    for spectator in spectators:
+        broadcaster.subscribe(spectator.stream)
+
+    for ply, move in enumerate(random_moves(game, seed, 60)):
+        broadcaster.publish_move(move)
+
+        if ply == 12:
+            # a spectator joining mid-game starts from the current keyframe
+            spectators.append(Spectator(BlockingStream(3)))
+            broadcaster.subscribe(spectators[-1].stream)
+
+        # blocking streams take a few bytes per flush, so events arrive over several flushes
+        while any(subscriber.get_pending() for subscriber in broadcaster.get_subscribers()):
+            broadcaster.flush()
+
+        for spectator in spectators:
+            spectator.catch_up()
+            assert position_key(spectator.game) == position_key(game)
+
+    assert broadcaster.get_dropped_count() == 0
+
+
+def test_partial_writes_resume_mid_event():
+    """Partly written events are finished on the next flush, never repeated or skipped."""
+    for stream in (TrickleStream(4), BlockingStream(4)):
+        subscriber = Subscriber(stream)
+        subscriber.enqueue(b'first event\n')
+        subscriber.enqueue(b'second\n')
+
+        while subscriber.get_pending():
+            assert subscriber.flush()
+
+        assert bytes(stream.data) == b'first event\nsecond\n'
+
+
+def test_buffering_stream_is_drained():
+    """A stream whose write returns None and isn't a raw stream takes each event whole."""
+    stream = BufferingStream()
+    subscriber = Subscriber(stream)
+    subscriber.enqueue(b'a\n')
+    subscriber.enqueue(b'b\n')
+
+    assert subscriber.flush()
+    assert subscriber.get_pending() == 0
+    assert bytes(stream.data) == b'a\nb\n'
+
+
+def test_raw_stream_returning_none_keeps_backlog():
+    """A non-blocking raw stream returning None would block, so nothing is removed."""
+
+    class WouldBlock(io.RawIOBase):
+        def writable(self):
+            return True
+
+        def write(self, data):
+            return None
+
+    subscriber = Subscriber(WouldBlock())
+    subscriber.enqueue(b'a\n')
+
+    assert subscriber.flush()
+    assert subscriber.get_pending() == 1
+
+
+def test_slow_and_failing_spectators_are_dropped():
+    """A spectator that falls max_pending events behind or whose stream fails is dropped."""
+
+    class BrokenStream:
+        def write(self, data):
+            raise ConnectionResetError()
+
+    game = QuoridorGame()
+    broadcaster = Broadcaster(game)
+    slow = broadcaster.subscribe(TrickleStream(0), max_pending=3)
+    broken = broadcaster.subscribe(BrokenStream())
+
+    broadcaster.flush()
+    assert broken.is_dropped()
+    assert broadcaster.get_subscribers() == [slow]
+
+    for move in random_moves(game, 0, 5):
+        broadcaster.publish_move(move)
+    assert slow.is_dropped()
+    assert broadcaster.get_subscribers() == []
+    assert broadcaster.get_dropped_count() == 2
@@ -0,0 +1,210 @@
+#  Tests for the move journal
+#  Journals are written to pytest's tmp_path and read back with recover.
+
+import os
+import time
+
+import pytest
+
+from journal import MoveJournal, _repair_tail, recover
+from perft import setup_position
+from symmetry import position_key
+
+MOVES = [('m', (1, 4)), ('m', (7, 4)), ('h', (6, 4)), ('v', (2, 3))]
+
+
+def play_game(move_journal, session_id, moves):
+    """Starts a journaled game for the session and plays the moves through the journal."""
+    game = setup_position([])
+    move_journal.start_game(session_id)
+    for move in moves:
+        assert move_journal.play(session_id, game, move)
+    return game
+
+
+def write_lines(path, lines):
+    """Writes raw journal lines (bytes, newlines included) to path."""
+    with open(path, 'wb') as journal_file:
+        journal_file.write(b''.join(lines))
+
+
+def test_recover_rebuilds_games_in_progress(tmp_path):
+    """Games in progress come back in the position they were left in; ended games don't."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path)
+    game_a = play_game(move_journal, 'a', MOVES)
+    game_b = play_game(move_journal, ['b', 2], MOVES[:2])
+    play_game(move_journal, 'c', MOVES)
+    move_journal.end_game('c')
+    move_journal.close()
+
+    games, dropped = recover(path)
+
+    assert set(games) == {'a', ('b', 2)}
+    assert position_key(games['a']) == position_key(game_a)
+    assert position_key(games[('b', 2)]) == position_key(game_b)
+    assert dropped == set()
+
+
+def test_recover_missing_file(tmp_path):
+    """A journal that was never written recovers no games."""
+    assert recover(str(tmp_path / 'missing.log')) == ({}, set())
+
+
+def test_recover_ignores_torn_last_line(tmp_path):
+    """A partly written final record is ignored."""
+    path = str(tmp_path / 'journal.log')
+    write_lines(path, [b'["a","n"]\n', b'["a","m",1,4]\n', b'["a","m",7'])
+
+    games, dropped = recover(path)
+
+    assert position_key(games['a']) == position_key(setup_position(MOVES[:1]))
+    assert dropped == set()
+
+
+def test_recover_rejects_unreadable_middle_line(tmp_path):
+    """An unreadable record before the last line can't be tied to a session, so it raises."""
+    path = str(tmp_path / 'journal.log')
+    write_lines(path, [b'["a","n"]\n', b'["a","m",1\n', b'["a","m",7,4]\n'])
+
+    with pytest.raises(ValueError):
+        recover(path)
+
+
+@pytest.mark.parametrize('bad_record', [b'["a","m",5,5]\n', b'["a","x",1,4]\n', b'["a","m",1]\n'],
+                         ids=['illegal move', 'unknown kind', 'missing coords'])
+def test_recover_drops_sessions_that_cannot_replay(tmp_path, bad_record):
+    """A session with a record that doesn't replay is dropped and reported; others are kept."""
+    path = str(tmp_path / 'journal.log')
+    write_lines(path, [b'["a","n"]\n', b'["b","n"]\n', b'["a","m",1,4]\n', bad_record,
+                       b'["a","m",7,4]\n', b'["b","m",1,4]\n'])
+
+    games, dropped = recover(path)
+
+    assert set(games) == {'b'}
+    assert dropped == {'a'}
+
+
+def test_recover_new_game_clears_dropped_session(tmp_path):
+    """Starting a new game in a dropped session replays it again."""
+    path = str(tmp_path / 'journal.log')
+    write_lines(path, [b'["a","n"]\n', b'["a","m",5,5]\n', b'["a","n"]\n', b'["a","m",1,4]\n'])
+
+    games, dropped = recover(path)
+
+    assert position_key(games['a']) == position_key(setup_position(MOVES[:1]))
+    assert dropped == set()
+
+
+def test_repair_tail_cuts_partial_line(tmp_path):
+    """_repair_tail cuts everything after the last newline and leaves complete journals alone."""
+    path = str(tmp_path / 'journal.log')
+
+    write_lines(path, [b'["a","n"]\n', b'["a","m",1,4]\n', b'["a","m"'])
+    _repair_tail(path)
+    with open(path, 'rb') as journal_file:
+        assert journal_file.read() == b'["a","n"]\n["a","m",1,4]\n'
+
+    _repair_tail(path)
+    with open(path, 'rb') as journal_file:
+        assert journal_file.read() == b'["a","n"]\n["a","m",1,4]\n'
+
+    write_lines(path, [b'x' * 10000])
+    _repair_tail(path)
+    assert os.path.getsize(path) == 0
+
+    _repair_tail(str(tmp_path / 'missing.log'))
+    assert not os.path.exists(str(tmp_path / 'missing.log'))
+
+
+def test_reopened_journal_appends_after_torn_line(tmp_path):
+    """Opening a journal with a torn last line starts the next record on a line of its own."""
+    path = str(tmp_path / 'journal.log')
+    write_lines(path, [b'["a","n"]\n', b'["a","m",1,4]\n', b'["a","m",7'])
+
+    move_journal = MoveJournal(path)
+    move_journal.append('a', ('m', (7, 4)))
+    move_journal.close()
+
+    games, dropped = recover(path)
+    assert position_key(games['a']) == position_key(setup_position(MOVES[:2]))
+
+
+def test_fsync_every_records(tmp_path):
+    """With fsync_every=N, records are synced once N have been written."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path, fsync_every=3)
+    move_journal.start_game('a')
+    move_journal.append('a', MOVES[0])
+
+    time.sleep(0.2)
+    assert move_journal.get_stats() == {'records_written': 2, 'fsyncs': 0}
+
+    move_journal.append('a', MOVES[1])
+    deadline = time.monotonic() + 5
+    while move_journal.get_stats()['fsyncs'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert move_journal.get_stats() == {'records_written': 3, 'fsyncs': 1}
+    move_journal.close()
+
+
+def test_fsync_interval(tmp_path):
+    """With only fsync_interval_ms set, waiting records are synced once the interval passes."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path, fsync_every=None, fsync_interval_ms=50)
+    move_journal.start_game('a')
+
+    deadline = time.monotonic() + 5
+    while move_journal.get_stats()['fsyncs'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert move_journal.get_stats() == {'records_written': 1, 'fsyncs': 1}
+
+    # nothing new to sync, so no more fsyncs
+    time.sleep(0.2)
+    assert move_journal.get_stats()['fsyncs'] == 1
+    move_journal.close()
+
+
+def test_sync_without_fsync_settings(tmp_path):
+    """With both settings None, records are only synced on sync() and close()."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path, fsync_every=None)
+    move_journal.start_game('a')
+    time.sleep(0.2)
+    assert move_journal.get_stats()['fsyncs'] == 0
+
+    move_journal.sync()
+    assert move_journal.get_stats() == {'records_written': 1, 'fsyncs': 1}
+    move_journal.close()
+
+
+def test_fsync_error_is_reported(tmp_path, monkeypatch):
+    """A failed fsync is raised from sync, later calls and close instead of hanging or being lost."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path, fsync_every=None)
+
+    def failing_fsync(fd):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(os, 'fsync', failing_fsync)
+    move_journal.start_game('a')
+
+    with pytest.raises(OSError):
+        move_journal.sync()
+    with pytest.raises(OSError):
+        move_journal.append('a', MOVES[0])
+    with pytest.raises(OSError):
+        move_journal.close()
+
+
+def test_calls_after_close(tmp_path):
+    """A closed journal refuses new records; closing again does nothing."""
+    path = str(tmp_path / 'journal.log')
+    move_journal = MoveJournal(path)
+    move_journal.close()
+    move_journal.close()
+
+    with pytest.raises(ValueError):
+        move_journal.start_game('a')
+    with pytest.raises(ValueError):
+        move_journal.sync()
@@ -0,0 +1,56 @@
+#  Perft tests for Quoridor
+#  Checks the move rules in QuoridorGame against the known node counts in
+#  perft.REFERENCE_POSITIONS.
+
+import pytest
+
+from perft import REFERENCE_POSITIONS, divide, perft, setup_position
+
+# the deepest count of each position is checked through divide in test_divide_sums_to_perft,
+# so it isn't searched twice
+CASES = [(position['name'], position['moves'], depth, count)
+         for position in REFERENCE_POSITIONS
+         for depth, count in sorted(position['counts'].items())
+         if depth < max(position['counts'])]
+
+
+def fence_flags(game):
+    """Returns the h, v and start flags of every fence vertex on the board."""
+    return [(fence.get_h_fence(), fence.get_v_fence(), fence.get_h_fence_start(), fence.get_v_fence_start())
+            for row in game.get_fences() for fence in row]
+
+
+def pieces(game):
+    """Returns which pawn (or None) is on every tile of the board."""
+    return [tile.get_piece() for row in game.get_board() for tile in row]
+
+
+@pytest.mark.parametrize('name, moves, depth, count', CASES, ids=[
+    name + ' depth ' + str(depth) for name, moves, depth, count in CASES])
+def test_reference_counts(name, moves, depth, count):
+    """Perft from each reference position matches its known count."""
+    game = setup_position(moves)
+    assert perft(game, depth) == count
+
+
+@pytest.mark.parametrize('position', REFERENCE_POSITIONS, ids=[
+    position['name'] for position in REFERENCE_POSITIONS])
+def test_divide_sums_to_perft(position):
+    """
+    The divide breakdown at the deepest known depth adds up to that depth's count, has one
+    entry per move at depth 1, and leaves the game exactly as it was.
+    """
+    game = setup_position(position['moves'])
+    before = setup_position(position['moves'])
+    depth = max(position['counts'])
+    results = divide(game, depth)
+
+    assert sum(results.values()) == position['counts'][depth]
+    assert len(results) == position['counts'][1]
+    assert game.get_turn() == before.get_turn()
+    assert game.get_player_loc(1) == before.get_player_loc(1)
+    assert game.get_player_loc(2) == before.get_player_loc(2)
+    assert game.player_fences(1) == before.player_fences(1)
+    assert game.player_fences(2) == before.player_fences(2)
+    assert pieces(game) == pieces(before)
+    assert fence_flags(game) == fence_flags(before)
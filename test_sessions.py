@@ -0,0 +1,96 @@
+#  Tests for the session store
+#  Budgets are set to a few live games so hibernation and restoration happen on every test.
+
+import random
+
+import pytest
+
+from Quoridor import QuoridorGame
+from sessions import SessionStore, decode_game, encode_game, estimate_game_size
+from symmetry import position_key
+
+
+def random_game(seed, plies):
+    """Returns a game after up to plies random legal moves."""
+    rng = random.Random(seed)
+    game = QuoridorGame()
+    for _ in range(plies):
+        if game.is_winner(1) or game.is_winner(2):
+            break
+        moves = [('m', dest) for dest in game.get_valid_destinations()] + sorted(game.get_valid_fences())
+        assert game.play_move(rng.choice(moves))
+    return game
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_encode_decode_round_trip(seed):
+    """Decoding an encoded game gives back the same position, in 21 bytes."""
+    game = random_game(seed, 10 + seed * 8)
+    data = encode_game(game)
+
+    assert len(data) == 21
+    assert position_key(decode_game(data)) == position_key(game)
+    assert encode_game(decode_game(data)) == data
+
+
+def test_decoded_game_keeps_playing():
+    """A decoded game has the same legal moves as the original."""
+    game = random_game(1, 30)
+    restored = decode_game(encode_game(game))
+
+    assert restored.get_valid_destinations() == game.get_valid_destinations()
+    assert restored.get_valid_fences() == game.get_valid_fences()
+
+
+def test_lru_hibernation_and_restore():
+    """With room for two live games, the least recently used ones are hibernated and restored on get."""
+    store = SessionStore(max_bytes=2 * estimate_game_size(QuoridorGame()))
+    games = {session_id: random_game(session_id, 12) for session_id in range(4)}
+    for session_id, game in games.items():
+        store.put(session_id, game)
+
+    stats = store.get_stats()
+    assert (stats['live'], stats['hibernated']) == (2, 2)
+    assert (stats['hibernations'], stats['restorations']) == (2, 0)
+    assert len(store) == 4 and 0 in store and 4 not in store
+
+    # 2 and 3 are live, so getting 2 restores nothing and makes 3 the least recently used
+    assert store.get(2) is games[2]
+    assert store.get_stats()['restorations'] == 0
+
+    restored = store.get(0)
+    assert position_key(restored) == position_key(games[0])
+    stats = store.get_stats()
+    assert (stats['live'], stats['hibernated']) == (2, 2)
+    assert (stats['hibernations'], stats['restorations']) == (3, 1)
+    assert store.get(3) is not games[3]
+    assert store.get_stats()['restorations'] == 2
+
+    assert store.get(4) is None
+    store.remove(0)
+    assert len(store) == 3 and 0 not in store
+
+
+def test_most_recent_game_stays_live():
+    """A budget smaller than one game still keeps the most recently used game live."""
+    store = SessionStore(max_bytes=1)
+    store.put('a', QuoridorGame())
+    store.put('b', QuoridorGame())
+
+    stats = store.get_stats()
+    assert (stats['live'], stats['hibernated']) == (1, 1)
+    assert store.get('a') is not None
+    assert store.get_stats()['hibernations'] == 2
+
+
+def test_stats_bytes():
+    """Hibernated games are counted at the memory their bytes objects hold, far below a live game."""
+    store = SessionStore(max_bytes=1)
+    for session_id in range(3):
+        store.put(session_id, QuoridorGame())
+
+    stats = store.get_stats()
+    assert stats['hibernated_bytes'] == 2 * stats['bytes_per_hibernated_game']
+    assert stats['bytes_per_hibernated_game'] > 21
+    assert stats['bytes_per_hibernated_game'] * 100 < stats['bytes_per_live_game']
+    assert stats['live_bytes'] == stats['bytes_per_live_game']
@@ -0,0 +1,76 @@
+#  Tests for mirror symmetry
+#  Random playouts are replayed mirrored; the mirrored game must match mirror_key at every ply.
+
+import random
+
+import pytest
+
+from Quoridor import QuoridorGame
+from symmetry import (canonicalize, game_from_key, mirror_key, mirror_move, position_key,
+                      to_canonical_move, to_original_move)
+
+
+def legal_moves(game):
+    """Returns every legal move for the player whose turn it is."""
+    return [('m', dest) for dest in game.get_valid_destinations()] + sorted(game.get_valid_fences())
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_mirrored_replay_matches_mirror_key(seed):
+    """Replaying mirrored moves is legal and reaches the mirror of every position."""
+    rng = random.Random(seed)
+    game = QuoridorGame()
+    mirrored_game = QuoridorGame()
+
+    for _ in range(40):
+        if game.is_winner(1) or game.is_winner(2):
+            break
+        move = rng.choice(legal_moves(game))
+        assert game.play_move(move)
+        assert mirrored_game.play_move(mirror_move(move))
+
+        assert position_key(mirrored_game) == mirror_key(position_key(game))
+        assert sorted(mirror_move(move) for move in legal_moves(game)) == sorted(legal_moves(mirrored_game))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_canonicalize_round_trip(seed):
+    """A position and its mirror share a canonical key, and canonical moves map back."""
+    rng = random.Random(seed)
+    game = QuoridorGame()
+    mirrored_game = QuoridorGame()
+
+    for _ in range(30):
+        if game.is_winner(1) or game.is_winner(2):
+            break
+        move = rng.choice(legal_moves(game))
+
+        key, mirrored = canonicalize(game)
+        assert canonicalize(mirrored_game)[0] == key
+        assert to_original_move(to_canonical_move(move, mirrored), mirrored) == move
+        assert position_key(game_from_key(key)) == key
+
+        assert game.play_move(move)
+        assert mirrored_game.play_move(mirror_move(move))
+
+
+def test_mirror_is_its_own_inverse():
+    """Mirroring a key or move twice gives it back; the start position mirrors onto itself."""
+    game = QuoridorGame()
+    for move in [('h', (3, 2)), ('v', (5, 1)), ('h', (7, 6))]:
+        assert game.play_move(move)
+        assert mirror_move(mirror_move(move)) == move
+
+    key = position_key(game)
+    assert mirror_key(mirror_key(key)) == key
+    assert canonicalize(QuoridorGame()) == (position_key(QuoridorGame()), False)
+
+
+def test_game_from_key_swapped_pawns():
+    """game_from_key can put each pawn on the other's starting tile."""
+    key = (2, (8, 4), (0, 4), 3, 7, ((4, 0),), ((2, 5),))
+    game = game_from_key(key)
+
+    assert position_key(game) == key
+    assert game.get_board()[8][4].get_piece() == 1
+    assert game.get_board()[0][4].get_piece() == 2